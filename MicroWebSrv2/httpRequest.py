@@ -31,6 +31,18 @@ class HttpRequest :
 
     # ------------------------------------------------------------------------
 
+    def _processPipelinedRequest(self) :
+        # When the next request is already received while the response is
+        # still being sent, it is processed right away on a new HttpRequest,
+        # its response being queued in order on the same connection.
+        if self._xasCli.BufferedRecvLength and \
+           self._xasCli.PendingSendsCount <= self._mws2._maxPipelined :
+            HttpRequest(self._mws2, self._xasCli)
+            return True
+        return False
+
+    # ------------------------------------------------------------------------
+
     def _waitForRecvRequest(self) :
         self._httpVer  = ''
         self._method   = ''
@@ -139,8 +151,8 @@ class HttpRequest :
                 if cntLen <= self._mws2._maxContentLen :
                     def onContentRecv(xasCli, content, arg) :
                         self._content = content
-                        self._routeRequest()
-                        self._content = None
+                        if not self._routeRequest() :
+                            self._content = None
                     try :
                         self._xasCli.AsyncRecvData( size       = cntLen,
                                                     onDataRecv = onContentRecv,
@@ -159,22 +171,115 @@ class HttpRequest :
     # ------------------------------------------------------------------------
 
     def _routeRequest(self) :
+        # Returns True when the route handler is a coroutine still running or
+        # when the response is deferred, the received content being kept,
+        currentResp = self._response
+        routeResult = self._routeResult
         try :
-            currentResp = self._response
-            if self._routeResult.Args :
-                self._routeResult.Handler(self._mws2, self, self._routeResult.Args)
+            if routeResult.Args :
+                res = routeResult.Handler(self._mws2, self, routeResult.Args)
             else :
-                self._routeResult.Handler(self._mws2, self)
-            if not currentResp.HeadersSent :
-                self._mws2.Log( 'No response was sent from route %s.'
-                                % self._routeResult,
-                                self._mws2.WARNING )
-                currentResp.ReturnNotImplemented()
+                res = routeResult.Handler(self._mws2, self)
+            if res is not None and hasattr(res, 'send') :
+                self._keepContent()
+                self._runRouteCoroutine(res, currentResp, routeResult)
+                return True
+            self._endRoute(currentResp, routeResult)
+            if currentResp.IsDeferred and not currentResp.HeadersSent :
+                return True
         except Exception as ex :
+            self._endRoute(currentResp, routeResult, ex)
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def _keepContent(self) :
+        # The received content is only valid during the route handler call,
+        # it is copied when it must remain available after,
+        if self._content is not None and not isinstance(self._content, bytes) :
+            self._content = bytes(self._content)
+
+    # ------------------------------------------------------------------------
+
+    def _runRouteCoroutine(self, coro, currentResp, routeResult) :
+        # The coroutine has the requests timeout as deadline and is cancelled
+        # as soon as the connection is closed,
+        xasPool           = self._xasCli.GetAsyncSocketsPool()
+        self._coroFuture  = None
+        self._coroExpired = False
+        self._coroTimer   = xasPool.CallLater( self._mws2._timeoutSec,
+                                               self._onRouteCoroutineTimeout,
+                                               (currentResp, routeResult) )
+        self._xasCli.OnClosed = self._onRouteCoroutineCliClosed
+        try :
+            self._coroFuture = xasPool.AsyncRunCoroutine( coro,
+                                                          self._onRouteCoroutineDone,
+                                                          (currentResp, routeResult, self._content) )
+        except :
+            self._endRouteCoroutine()
+            raise
+        if self._coroExpired :
+            xasPool.CancelCoroutine(self._coroFuture)
+        else :
+            self._xasCli.AsyncWatchClosed(True)
+
+    # ------------------------------------------------------------------------
+
+    def _endRouteCoroutine(self) :
+        self._coroTimer.Cancel()
+        self._xasCli.AsyncWatchClosed(False)
+        if self._xasCli.OnClosed == self._onRouteCoroutineCliClosed :
+            self._xasCli.OnClosed = None
+
+    # ------------------------------------------------------------------------
+
+    def _cancelRouteCoroutine(self) :
+        self._coroExpired = True
+        self._endRouteCoroutine()
+        if self._coroFuture is not None :
+            self._xasCli.GetAsyncSocketsPool().CancelCoroutine(self._coroFuture)
+
+    # ------------------------------------------------------------------------
+
+    def _onRouteCoroutineTimeout(self, timer, arg) :
+        currentResp, routeResult = arg
+        self._cancelRouteCoroutine()
+        if not currentResp.HeadersSent :
+            self._mws2.Log( 'Coroutine of route %s not completed in time.'
+                            % routeResult,
+                            self._mws2.WARNING )
+            currentResp.ReturnServiceUnavailable()
+
+    # ------------------------------------------------------------------------
+
+    def _onRouteCoroutineCliClosed(self, xasCli, closedReason) :
+        self._cancelRouteCoroutine()
+
+    # ------------------------------------------------------------------------
+
+    def _onRouteCoroutineDone(self, xasPool, result, error, arg) :
+        currentResp, routeResult, content = arg
+        if content is not None and self._content is content :
+            self._content = None
+        if self._coroExpired :
+            return
+        self._endRouteCoroutine()
+        self._endRoute(currentResp, routeResult, error)
+
+    # ------------------------------------------------------------------------
+
+    def _endRoute(self, currentResp, routeResult, error=None) :
+        if error is not None :
             self._mws2.Log( 'Exception raised from route %s: %s'
-                            % (self._routeResult, ex),
+                            % (routeResult, error),
                             self._mws2.ERROR )
-            currentResp.ReturnInternalServerError()
+            if not currentResp.HeadersSent :
+                currentResp.ReturnInternalServerError()
+        elif not currentResp.HeadersSent and not currentResp.IsDeferred :
+            self._mws2.Log( 'No response was sent from route %s.'
+                            % routeResult,
+                            self._mws2.WARNING )
+            currentResp.ReturnNotImplemented()
 
     # ------------------------------------------------------------------------
 
@@ -108,6 +108,8 @@ class HttpResponse :
     </html>
     """
 
+    _GATHER_CONTENT_MIN_LEN = 4*1024
+
     # ------------------------------------------------------------------------
 
     def __init__(self, microWebSrv2, request) :
@@ -122,8 +124,12 @@ class HttpResponse :
         self._contentLength   = 0
         self._stream          = None
         self._sendingBuf      = None
+        self._ownsSendBuf     = False
         self._hdrSent         = False
         self._onSent          = None
+        self._keepAlive       = False
+        self._pipelined       = False
+        self._deferred        = None
 
     # ------------------------------------------------------------------------
 
@@ -139,6 +145,9 @@ class HttpResponse :
     def _onDataSent(self, xasCli, arg) :
         if self._stream :
             try :
+                # The sending buffer is read again for each chunk, it is kept
+                # by the client until this response releases it,
+                self._sendingBuf = memoryview(self._xasCli.SendingBuffer)
                 n = self._stream.readinto(self._sendingBuf)
                 if n < len(self._sendingBuf) :
                     self._stream.close()
@@ -172,9 +181,14 @@ class HttpResponse :
                 data = ('%x\r\n' % len(self._sendingBuf)).encode()
                 self._xasCli.AsyncSendData(data, onDataSent=onChunkHdrSent)
         else :
-            self._xasCli.OnClosed = None
+            if self._ownsSendBuf :
+                self._ownsSendBuf = False
+                self._xasCli.ReleaseSendingBuffer()
+            if self._xasCli.OnClosed == self._onClosed :
+                self._xasCli.OnClosed = None
             if self._keepAlive :
-                self._request._waitForRecvRequest()
+                if not self._pipelined :
+                    self._request._waitForRecvRequest()
             else :
                 self._xasCli.Close()
             if self._onSent :
@@ -186,6 +200,12 @@ class HttpResponse :
 
     # ------------------------------------------------------------------------
 
+    def _onFileSent(self, xasCli, arg) :
+        self._onClosed(xasCli, None)
+        self._onDataSent(xasCli, arg)
+
+    # ------------------------------------------------------------------------
+
     def _onClosed(self, xasCli, closedReason) :
         if self._stream :
             try :
@@ -277,8 +297,19 @@ class HttpResponse :
                 pass
             return
         if self._request._method != 'HEAD' :
+            if self._xasCli.AcquireSendingBuffer() is None :
+                # All the buffer slots of the server are in use,
+                try :
+                    stream.close()
+                except :
+                    pass
+                self._mws2.Log( 'No sending buffer available for request "%s".'
+                                % self._request._path,
+                                self._mws2.WARNING )
+                self.ReturnServiceUnavailable()
+                return
+            self._ownsSendBuf     = True
             self._stream          = stream
-            self._sendingBuf      = memoryview(self._xasCli.SendingBuffer)
             self._xasCli.OnClosed = self._onClosed
         else :
             try :
@@ -319,9 +350,17 @@ class HttpResponse :
         self._contentLength = len(content)
         data = self._makeResponseHdr(code)
         if self._request._method != 'HEAD' :
-            data += bytes(content)
+            if len(content) > HttpResponse._GATHER_CONTENT_MIN_LEN :
+                # Headers and a large content are queued as separate buffers
+                # and are gathered when sent, to avoid to copy the content,
+                self._xasCli.AsyncSendData(data)
+                data = bytes(content)
+            else :
+                data += bytes(content)
         self._xasCli.AsyncSendData(data, onDataSent=self._onDataSent)
         self._hdrSent = True
+        if self._keepAlive :
+            self._pipelined = self._request._processPipelinedRequest()
 
     # ------------------------------------------------------------------------
 
@@ -368,7 +407,18 @@ class HttpResponse :
         if not self._contentType :
             self._contentType = self._mws2.GetMimeTypeFromFilename(filename)
         self._contentLength = size
-        self.ReturnStream(200, file)
+        if size and not self._hdrSent and self._request._method != 'HEAD' and self._xasCli.CanSendFile :
+            # On plain TCP connections, the file is sent without any copy,
+            self._stream          = file
+            self._xasCli.OnClosed = self._onClosed
+            data = self._makeResponseHdr(200)
+            self._xasCli.AsyncSendFile( file       = file,
+                                        size       = size,
+                                        onDataSent = self._onFileSent,
+                                        prefixData = data )
+            self._hdrSent = True
+        else :
+            self.ReturnStream(200, file)
 
     # ------------------------------------------------------------------------
 
@@ -451,6 +501,18 @@ class HttpResponse :
 
     # ------------------------------------------------------------------------
 
+    def Defer(self, timeoutSec=None) :
+        if timeoutSec is None :
+            timeoutSec = HttpDeferredResponse.DEFAULT_TIMEOUT_SEC
+        elif not isinstance(timeoutSec, (int, float)) or timeoutSec <= 0 :
+            raise ValueError('"timeoutSec" must be a positive number or None.')
+        if not self._deferred :
+            self._request._keepContent()
+            self._deferred = HttpDeferredResponse(self, timeoutSec)
+        return self._deferred
+
+    # ------------------------------------------------------------------------
+
     @property
     def Request(self) :
         return self._request
@@ -535,6 +597,12 @@ class HttpResponse :
 
     # ------------------------------------------------------------------------
 
+    @property
+    def IsDeferred(self) :
+        return (self._deferred is not None)
+
+    # ------------------------------------------------------------------------
+
     @property
     def OnSent(self) :
         return self._onSent
@@ -545,6 +613,96 @@ class HttpResponse :
             raise ValueError('"OnSent" must be a function.')
         self._onSent = value
 
+# ============================================================================
+# ===( HttpDeferredResponse )=================================================
+# ============================================================================
+
+class HttpDeferredResponse :
+
+    DEFAULT_TIMEOUT_SEC = 30
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, response, timeoutSec=DEFAULT_TIMEOUT_SEC) :
+        self._response = response
+        self._xasPool  = response._xasCli.GetAsyncSocketsPool()
+        self._expired  = False
+        self._timer    = self._xasPool.CallLater(timeoutSec, self._onTimeout)
+
+    # ------------------------------------------------------------------------
+
+    def _onTimeout(self, timer, arg) :
+        # A deferred response never completed would hold the connection and
+        # its buffers, so it is answered when its deadline expires,
+        resp          = self._response
+        self._expired = True
+        if not resp._hdrSent :
+            resp._mws2.Log( 'Deferred response of "%s" not completed in time.'
+                            % resp._request._path,
+                            resp._mws2.WARNING )
+            resp.ReturnServiceUnavailable()
+
+    # ------------------------------------------------------------------------
+
+    def _complete(self, timer, arg) :
+        func, args = arg
+        resp       = self._response
+        self._timer.Cancel()
+        if self._expired :
+            return
+        try :
+            func(resp, *args)
+        except Exception as ex :
+            resp._mws2.Log( 'Exception raised from deferred response of "%s": %s'
+                            % (resp._request._path, ex),
+                            resp._mws2.ERROR )
+            if not resp._hdrSent :
+                resp.ReturnInternalServerError()
+            return
+        if not resp._hdrSent :
+            resp._mws2.Log( 'No response was sent from deferred response of "%s".'
+                            % resp._request._path,
+                            resp._mws2.WARNING )
+            resp.ReturnNotImplemented()
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _onResult(resp, future, onDone) :
+        onDone(resp, future.result())
+
+    # ------------------------------------------------------------------------
+
+    def Complete(self, func, *args) :
+        # Can be called from any thread, "func" is called back in the pool
+        # that is woken up to send the response,
+        if not callable(func) :
+            raise ValueError('"func" must be a function.')
+        self._xasPool.CallLater(0, self._complete, (func, args))
+
+    # ------------------------------------------------------------------------
+
+    def Submit(self, func, onDone, *args) :
+        if not callable(func) :
+            raise ValueError('"func" must be a function.')
+        if not callable(onDone) :
+            raise ValueError('"onDone" must be a function.')
+        future = self._response._mws2._getExecutor().submit(func, *args)
+        def onWorkDone(future) :
+            self.Complete(HttpDeferredResponse._onResult, future, onDone)
+        future.add_done_callback(onWorkDone)
+        return future
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def Response(self) :
+        return self._response
+
+    @property
+    def IsExpired(self) :
+        return self._expired
+
 # ============================================================================
 # ============================================================================
 # ============================================================================
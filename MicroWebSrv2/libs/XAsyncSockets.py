@@ -4,12 +4,23 @@ Copyright © 2019 Jean-Christophe Bos & HC² (www.hc2.fr)
 """
 
 
-from   _thread  import allocate_lock, start_new_thread, stack_size
+from   _thread  import allocate_lock, start_new_thread, stack_size, get_ident
 from   time     import sleep
 from   select   import select
+from   sys      import implementation
 import socket
 import ssl
 
+try :
+    from select import epoll, EPOLLIN, EPOLLOUT, EPOLLERR, EPOLLHUP, EPOLLET
+except :
+    epoll = None
+
+try :
+    from select import poll, POLLIN, POLLOUT, POLLERR, POLLHUP, POLLNVAL
+except :
+    poll = None
+
 try :
     from time import perf_counter
 except :
@@ -17,6 +28,330 @@ except :
     def perf_counter() :
         return ticks_ms() / 1000
 
+try :
+    from heapq import heappush, heappop
+except :
+    from uheapq import heappush, heappop
+
+try :
+    import asyncio
+except :
+    asyncio = None
+
+try :
+    from os import sendfile
+except :
+    sendfile = None
+
+try :
+    from socket import TCP_CORK as _TCP_CORK
+except :
+    _TCP_CORK = None
+
+try :
+    from collections import deque
+    deque()
+except :
+    class deque(list) :
+        def popleft(self) :
+            return self.pop(0)
+
+try :
+    from errno import EAGAIN, EWOULDBLOCK
+    _WOULD_BLOCK_ERRNOS = (EAGAIN, EWOULDBLOCK)
+except :
+    _WOULD_BLOCK_ERRNOS = (11, 35)
+
+# ============================================================================
+# ===( XPollingBackend )======================================================
+# ============================================================================
+
+class XPollingBackend() :
+
+    Auto    = 0x00
+    Select  = 0x01
+    Poll    = 0x02
+    Epoll   = 0x03
+    Asyncio = 0x04
+
+# ============================================================================
+# ===( XAsyncSelectPoller )===================================================
+# ============================================================================
+
+class XAsyncSelectPoller :
+
+    def __init__(self, opLock) :
+        self._opLock    = opLock
+        self._readSet   = set()
+        self._writeSet  = set()
+        self._readList  = [ ]
+        self._writeList = [ ]
+        self._changed   = False
+
+    def Update(self, socket, readable, writable) :
+        # Called under the lock of the pool, the lists given to select are
+        # only rebuilt before polling when the interest has changed,
+        if readable :
+            self._readSet.add(socket)
+        else :
+            self._readSet.discard(socket)
+        if writable :
+            self._writeSet.add(socket)
+        else :
+            self._writeSet.discard(socket)
+        self._changed = True
+
+    def Rearm(self, socket) :
+        pass
+
+    def Poll(self, timeoutSec) :
+        if self._changed :
+            with self._opLock :
+                self._readList  = list(self._readSet)
+                self._writeList = list(self._writeSet)
+                self._changed   = False
+        return select(self._readList, self._writeList, self._readList, timeoutSec)
+
+    def Close(self) :
+        self._readSet.clear()
+        self._writeSet.clear()
+        self._readList  = [ ]
+        self._writeList = [ ]
+
+    @property
+    def Backend(self) :
+        return XPollingBackend.Select
+
+    @property
+    def NeedsWakeUp(self) :
+        return True
+
+# ============================================================================
+# ===( XAsyncPollPoller )=====================================================
+# ============================================================================
+
+class XAsyncPollPoller :
+
+    def __init__(self) :
+        self._poll     = poll()
+        self._fdSocks  = { }
+        self._sockRegs = { }
+        self._evtIn    = POLLIN
+        self._evtOut   = POLLOUT
+        self._evtRdErr = POLLIN  | POLLERR | POLLHUP
+        self._evtWrErr = POLLOUT | POLLERR | POLLHUP
+        self._evtErr   = POLLERR | POLLHUP | POLLNVAL
+
+    def _register(self, fd, mask) :
+        self._poll.register(fd, mask)
+
+    def _modify(self, fd, mask) :
+        self._poll.modify(fd, mask)
+
+    def _unregister(self, fd) :
+        self._poll.unregister(fd)
+
+    def _doPoll(self, timeoutSec) :
+        return self._poll.poll(int(timeoutSec * 1000))
+
+    def Update(self, socket, readable, writable) :
+        mask = (self._evtIn if readable else 0) | (self._evtOut if writable else 0)
+        reg  = self._sockRegs.get(socket)
+        try :
+            if reg :
+                fd = reg[0]
+                if not mask :
+                    del self._sockRegs[socket]
+                    self._fdSocks.pop(fd, None)
+                    self._unregister(fd)
+                elif mask != reg[1] :
+                    reg[1] = mask
+                    self._modify(fd, mask)
+            elif mask :
+                fd = socket.fileno()
+                self._sockRegs[socket] = [fd, mask]
+                self._fdSocks[fd]      = socket
+                self._register(fd, mask)
+        except :
+            pass
+
+    def Rearm(self, socket) :
+        pass
+
+    def Poll(self, timeoutSec) :
+        rd, wr, ex = [ ], [ ], [ ]
+        for fd, evt in self._doPoll(timeoutSec) :
+            socket = self._fdSocks.get(fd)
+            reg    = self._sockRegs.get(socket)
+            if reg :
+                mask  = reg[1]
+                event = False
+                if mask & self._evtIn and evt & self._evtRdErr :
+                    rd.append(socket)
+                    event = True
+                if mask & self._evtOut and evt & self._evtWrErr :
+                    wr.append(socket)
+                    event = True
+                if not event and evt & self._evtErr :
+                    ex.append(socket)
+        return rd, wr, ex
+
+    def Close(self) :
+        self._fdSocks.clear()
+        self._sockRegs.clear()
+
+    @property
+    def Backend(self) :
+        return XPollingBackend.Poll
+
+    @property
+    def NeedsWakeUp(self) :
+        return True
+
+# ============================================================================
+# ===( XAsyncEpollPoller )====================================================
+# ============================================================================
+
+class XAsyncEpollPoller(XAsyncPollPoller) :
+
+    def __init__(self, edgeTriggered=False) :
+        self._epoll     = epoll()
+        self._fdSocks   = { }
+        self._sockRegs  = { }
+        self._evtIn     = EPOLLIN  | (EPOLLET if edgeTriggered else 0)
+        self._evtOut    = EPOLLOUT | (EPOLLET if edgeTriggered else 0)
+        self._evtRdErr  = EPOLLIN  | EPOLLERR | EPOLLHUP
+        self._evtWrErr  = EPOLLOUT | EPOLLERR | EPOLLHUP
+        self._evtErr    = EPOLLERR | EPOLLHUP
+        self._edgeTrig  = edgeTriggered
+
+    def _register(self, fd, mask) :
+        self._epoll.register(fd, mask)
+
+    def _modify(self, fd, mask) :
+        self._epoll.modify(fd, mask)
+
+    def _unregister(self, fd) :
+        self._epoll.unregister(fd)
+
+    def _doPoll(self, timeoutSec) :
+        return self._epoll.poll(timeoutSec)
+
+    def Rearm(self, socket) :
+        # In edge-triggered mode, re-arming the registered interest forces
+        # the kernel to re-evaluate the readiness of the socket, so that
+        # data left unread by a handler is signaled again.
+        if self._edgeTrig :
+            reg = self._sockRegs.get(socket)
+            if reg :
+                try :
+                    self._modify(reg[0], reg[1])
+                except :
+                    pass
+
+    def Close(self) :
+        super().Close()
+        try :
+            self._epoll.close()
+        except :
+            pass
+
+    @property
+    def Backend(self) :
+        return XPollingBackend.Epoll
+
+    @property
+    def NeedsWakeUp(self) :
+        return False
+
+    @property
+    def EdgeTriggered(self) :
+        return self._edgeTrig
+
+# ============================================================================
+# ===( XAsyncioPoller )=======================================================
+# ============================================================================
+
+class XAsyncioPoller :
+
+    def __init__(self, pool) :
+        self._pool     = pool
+        self._interest = { }
+
+    def Update(self, sock, rd, wr) :
+        self._pool._callInLoop(self._update, sock, rd, wr)
+
+    def _update(self, sock, rd, wr) :
+        # Reader states : False (none), True (wanted), None (kept registered),
+        loop                = self._pool._loop
+        curRd, curWr, fd    = self._interest.get(sock, (False, False, None))
+        try :
+            # Registers the file descriptor to bypass the socket lookups of the loop,
+            if fd is None :
+                fd = sock.fileno()
+            if rd :
+                if curRd is False :
+                    loop.add_reader(fd, self._pool._onReadyForReading, sock)
+            elif curRd is not False :
+                if sock in self._pool._asyncSockets :
+                    # Keeps the reader until it fires while unwanted,
+                    # this avoids a loop round trip each time a line is read,
+                    rd = None
+                else :
+                    loop.remove_reader(fd)
+            if wr != curWr :
+                if wr :
+                    loop.add_writer(fd, self._pool._onReadyForWriting, sock)
+                else :
+                    loop.remove_writer(fd)
+        except :
+            # The socket has been closed in the meantime,
+            rd = wr = False
+        if rd is not False or wr :
+            self._interest[sock] = (rd, wr, fd)
+        elif sock in self._interest :
+            del self._interest[sock]
+
+    def DropUnwantedReader(self, sock) :
+        curRd, curWr, fd = self._interest.get(sock, (False, False, None))
+        if curRd is None :
+            try :
+                self._pool._loop.remove_reader(fd)
+            except :
+                pass
+            if curWr :
+                self._interest[sock] = (False, curWr, fd)
+            else :
+                del self._interest[sock]
+            return True
+        return False
+
+    def Rearm(self, sock) :
+        pass
+
+    def Poll(self, timeoutSec) :
+        raise XAsyncSocketsPoolException('Poll : Events are dispatched by the asyncio loop.')
+
+    def Close(self) :
+        loop = self._pool._loop
+        for rd, wr, fd in self._interest.values() :
+            try :
+                if rd is not False :
+                    loop.remove_reader(fd)
+                if wr :
+                    loop.remove_writer(fd)
+            except :
+                pass
+        self._interest.clear()
+
+    @property
+    def Backend(self) :
+        return XPollingBackend.Asyncio
+
+    @property
+    def NeedsWakeUp(self) :
+        return False
+
 # ============================================================================
 # ===( XAsyncSocketsPool )====================================================
 # ============================================================================
@@ -26,17 +361,53 @@ class XAsyncSocketsPoolException(Exception) :
 
 class XAsyncSocketsPool :
 
+    DEFAULT_MAX_QUEUED_JOBS_PER_THREAD = 64
+
     _CHECK_SEC_INTERVAL = 1.0
 
-    def __init__(self) :
-        self._processing   = None
-        self._microWorkers = None
-        self._opLock       = allocate_lock()
-        self._asyncSockets = { }
-        self._readList     = [ ]
-        self._writeList    = [ ]
-        self._handlingList = [ ]
-        self._udpSockEvt   = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    _INTEREST_READ      = 0x01
+    _INTEREST_WRITE     = 0x02
+
+    def __init__(self, pollingBackend=XPollingBackend.Auto, edgeTriggered=False) :
+        if pollingBackend == XPollingBackend.Auto :
+            if implementation.name == 'micropython' :
+                pollingBackend = XPollingBackend.Select
+            elif epoll :
+                pollingBackend = XPollingBackend.Epoll
+            elif poll :
+                pollingBackend = XPollingBackend.Poll
+            else :
+                pollingBackend = XPollingBackend.Select
+        if ( pollingBackend == XPollingBackend.Epoll and not epoll ) or \
+           ( pollingBackend == XPollingBackend.Poll  and not poll  ) or \
+           pollingBackend not in ( XPollingBackend.Select,
+                                   XPollingBackend.Poll,
+                                   XPollingBackend.Epoll ) :
+            raise XAsyncSocketsPoolException('"pollingBackend" is not supported on this platform.')
+        self._pollingBackend = pollingBackend
+        self._edgeTriggered  = (edgeTriggered and pollingBackend == XPollingBackend.Epoll)
+        self._processing     = None
+        self._microWorkers   = None
+        self._opLock         = allocate_lock()
+        self._asyncSockets   = { }
+        self._interests      = { }
+        self._readNowSet     = set()
+        self._pausedReaders  = { }
+        self._poller         = self._createPoller()
+        self._timersLock     = allocate_lock()
+        self._timers         = [ ]
+        self._timersSeq      = 0
+        self._nextWakeSec    = None
+        self._corosLoop      = None
+        self._waitEventsThID = None
+        self._udpSockEvt     = None
+        self._udpSockEvtAddr = None
+        self._createUDPSockEvent()
+
+    # ------------------------------------------------------------------------
+
+    def _createUDPSockEvent(self) :
+        self._udpSockEvt = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         for i in range(30) :
             self._udpSockEvtAddr = ('127.0.0.1', 54321+i)
             try :
@@ -44,6 +415,16 @@ class XAsyncSocketsPool :
                 break
             except :
                 pass
+        self._udpSockEvt.setblocking(0)
+
+    # ------------------------------------------------------------------------
+
+    def _createPoller(self) :
+        if self._pollingBackend == XPollingBackend.Epoll :
+            return XAsyncEpollPoller(self._edgeTriggered)
+        if self._pollingBackend == XPollingBackend.Poll :
+            return XAsyncPollPoller()
+        return XAsyncSelectPoller(self._opLock)
 
     # ------------------------------------------------------------------------
 
@@ -62,69 +443,268 @@ class XAsyncSocketsPool :
             with self._opLock :
                 if socket in self._asyncSockets :
                     del self._asyncSockets[socket]
-                if socket in self._readList :
-                    self._readList.remove(socket)
-                if socket in self._writeList :
-                    self._writeList.remove(socket)
+                if socket in self._interests :
+                    del self._interests[socket]
+                self._readNowSet.discard(socket)
+                self._pausedReaders.pop(socket, None)
+                self._poller.Update(socket, False, False)
+                if self._microWorkers :
+                    self._microWorkers.ReleaseAffinity(socket)
                 return True
         return False
 
     # ------------------------------------------------------------------------
 
-    def _socketListAdd(self, socket, socketsList) :
+    def _setInterest(self, socket, interest, value) :
+        # The interest of each socket is kept as flags, so that any change is
+        # done in constant time, and returns True if the interest has changed,
+        with self._opLock :
+            flags    = self._interests.get(socket, 0)
+            newFlags = (flags | interest) if value else (flags & ~interest)
+            if newFlags == flags :
+                return False
+            if newFlags :
+                self._interests[socket] = newFlags
+            else :
+                del self._interests[socket]
+            self._poller.Update( socket,
+                                 bool(newFlags & XAsyncSocketsPool._INTEREST_READ),
+                                 bool(newFlags & XAsyncSocketsPool._INTEREST_WRITE) )
+            return True
+
+    # ------------------------------------------------------------------------
+
+    def _addReadNow(self, socket) :
         with self._opLock :
-            if socket not in socketsList :
-                socketsList.append(socket)
+            if socket not in self._readNowSet :
+                self._readNowSet.add(socket)
                 return True
         return False
 
     # ------------------------------------------------------------------------
 
-    def _socketListRemove(self, socket, socketsList) :
+    def _removeReadNow(self, socket) :
         with self._opLock :
-            if socket in socketsList :
-                socketsList.remove(socket)
+            if socket in self._readNowSet :
+                self._readNowSet.remove(socket)
                 return True
         return False
 
     # ------------------------------------------------------------------------
 
+    def _pauseReading(self, socket) :
+        # The jobs queue is full, so the socket is no longer polled for reading
+        # until the workers notify that jobs can be queued again,
+        with self._opLock :
+            self._pausedReaders[socket] = None
+        self._setInterest(socket, XAsyncSocketsPool._INTEREST_READ, False)
+        self._microWorkers.NotifyNotFull()
+
+    # ------------------------------------------------------------------------
+
+    def _resumeReading(self) :
+        # Paused sockets are resumed in order and only as many as jobs can be
+        # queued, the others waiting for the next notification,
+        workers = self._microWorkers
+        count   = workers.MaxJobs - workers.JobsInQueue
+        resumed = [ ]
+        with self._opLock :
+            for sock in self._pausedReaders :
+                if len(resumed) >= count :
+                    break
+                resumed.append(sock)
+            for sock in resumed :
+                del self._pausedReaders[sock]
+            paused = (len(self._pausedReaders) > 0)
+        for sock in resumed :
+            self._setInterest(sock, XAsyncSocketsPool._INTEREST_READ, True)
+        if paused :
+            workers.NotifyNotFull()
+        return resumed
+
+    # ------------------------------------------------------------------------
+
+    def _onWorkersNotFull(self, microWorkers) :
+        # Called by a worker, the paused sockets are resumed by the loop,
+        self._sendUDPSockEvent()
+
+    # ------------------------------------------------------------------------
+
+    def _removeReadNowSockets(self, sockets) :
+        with self._opLock :
+            for sock in sockets :
+                self._readNowSet.discard(sock)
+
+    # ------------------------------------------------------------------------
+
     def _sendUDPSockEvent(self) :
         self._udpSockEvt.sendto(b'\xFF', self._udpSockEvtAddr)
 
     # ------------------------------------------------------------------------
 
+    def _pushTimer(self, timeSec, obj) :
+        self._timersSeq += 1
+        heappush(self._timers, (timeSec, self._timersSeq, obj))
+        if self._processing and \
+           self._nextWakeSec is not None and \
+           timeSec < self._nextWakeSec :
+            self._nextWakeSec = timeSec
+            return True
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def _scheduleTimer(self, timeSec, timer) :
+        with self._timersLock :
+            wakeUp = self._pushTimer(timeSec, timer)
+        if wakeUp :
+            self._sendUDPSockEvent()
+
+    # ------------------------------------------------------------------------
+
+    def _scheduleExpireTimeout(self, asyncSocket, expireTimeSec) :
+        # Only one entry per socket is kept in the heap: a later expiration
+        # reuses the current entry and is rescheduled when it pops up.
+        wakeUp = False
+        with self._timersLock :
+            timerSec = asyncSocket._expireTimerSec
+            if timerSec is None or expireTimeSec < timerSec :
+                asyncSocket._expireTimerSec = expireTimeSec
+                wakeUp = self._pushTimer(expireTimeSec, asyncSocket)
+        if wakeUp :
+            self._sendUDPSockEvent()
+
+    # ------------------------------------------------------------------------
+
+    def _processTimers(self) :
+        expired = [ ]
+        with self._timersLock :
+            timeSec = perf_counter()
+            while self._timers and self._timers[0][0] <= timeSec :
+                timerSec, _, obj = heappop(self._timers)
+                if isinstance(obj, XAsyncTimer) :
+                    if obj._active :
+                        if obj._intervalSec :
+                            obj._timeSec = max(timerSec + obj._intervalSec, timeSec)
+                            self._pushTimer(obj._timeSec, obj)
+                        else :
+                            obj._active = False
+                        expired.append(obj)
+                elif obj._expireTimerSec == timerSec :
+                    obj._expireTimerSec = None
+                    expireTimeSec       = obj._expireTimeSec
+                    if expireTimeSec is not None :
+                        if expireTimeSec > timeSec :
+                            obj._expireTimerSec = expireTimeSec
+                            self._pushTimer(expireTimeSec, obj)
+                        else :
+                            expired.append(obj)
+            if self._timers :
+                waitSec = min( self._timers[0][0] - timeSec,
+                               XAsyncSocketsPool._CHECK_SEC_INTERVAL )
+            else :
+                waitSec = XAsyncSocketsPool._CHECK_SEC_INTERVAL
+            self._nextWakeSec = timeSec + waitSec
+        for obj in expired :
+            if isinstance(obj, XAsyncTimer) :
+                if self._microWorkers :
+                    self._microWorkers.AddJob(obj._fire)
+                else :
+                    obj._fire()
+            else :
+                self._expireSocket(obj)
+        return waitSec
+
+    # ------------------------------------------------------------------------
+
+    def _beginHandling(self, asyncSocket) :
+        # The handling state is owned by each socket, so that workers ending
+        # their jobs never contend on the pool lock,
+        with asyncSocket._stateLock :
+            if asyncSocket._handling :
+                return False
+            asyncSocket._handling = True
+            return True
+
+    # ------------------------------------------------------------------------
+
+    def _endHandling(self, asyncSocket, socket) :
+        with asyncSocket._stateLock :
+            closedReason              = asyncSocket._pendingClose
+            asyncSocket._handling     = False
+            asyncSocket._pendingClose = None
+        if closedReason is not None :
+            # The socket has expired while it was handled by a worker,
+            try :
+                asyncSocket._close(closedReason)
+            except :
+                pass
+            return
+        with self._opLock :
+            readNow = (socket in self._readNowSet)
+        self._poller.Rearm(socket)
+        if readNow and self._microWorkers :
+            self._sendUDPSockEvent()
+
+    # ------------------------------------------------------------------------
+
+    def _expireSocket(self, asyncSocket) :
+        # A socket handled by a worker cannot be closed under its feet,
+        # so it will be closed by the worker at the end of its job,
+        with asyncSocket._stateLock :
+            if asyncSocket._handling :
+                asyncSocket._pendingClose = XClosedReason.Timeout
+                return
+        try :
+            asyncSocket._close(XClosedReason.Timeout)
+        except :
+            pass
+
+    # ------------------------------------------------------------------------
+
+    def _getReadNowSockets(self) :
+        with self._opLock :
+            if self._readNowSet :
+                readNow = [ ]
+                for sock in self._readNowSet :
+                    asyncSocket = self._asyncSockets.get(sock)
+                    if not asyncSocket or not asyncSocket._handling :
+                        readNow.append(sock)
+                return readNow
+        return None
+
+    # ------------------------------------------------------------------------
+
     def _processWaitEvents(self) :
 
         def jobExceptionalCondition(args) :
             if args[0].OnExceptionalCondition() :
                 self._removeSocket(args[1])
-            self._socketListRemove(args[1], self._handlingList)
+            self._endHandling(args[0], args[1])
 
         def jobReadyForWriting(args) :
             if args[0].OnReadyForWriting() :
                 self._removeSocket(args[1])
-            self._socketListRemove(args[1], self._handlingList)
+            self._endHandling(args[0], args[1])
 
         def jobReadyForReading(args) :
             if args[0].OnReadyForReading() :
                 self._removeSocket(args[1])
-            self._socketListRemove(args[1], self._handlingList)
+            self._endHandling(args[0], args[1])
 
-        self._processing = True
+        self._processing     = True
+        self._waitEventsThID = get_ident()
         
-        self._socketListAdd(self._udpSockEvt, self._readList)
+        self._setInterest(self._udpSockEvt, XAsyncSocketsPool._INTEREST_READ, True)
 
-        timeSec       = perf_counter()
         udpSockEvtBuf = bytearray(32)
         
         while self._processing :
             try :
                 try :
-                    rd, wr, ex = select( self._readList,
-                                         self._writeList,
-                                         self._readList,
-                                         XAsyncSocketsPool._CHECK_SEC_INTERVAL )
+                    waitSec    = self._processTimers()
+                    readNow    = self._getReadNowSockets()
+                    rd, wr, ex = self._poller.Poll(0 if readNow else waitSec)
                 except KeyboardInterrupt :
                     break
                 except :
@@ -132,55 +712,77 @@ class XAsyncSocketsPool :
                     continue
                 if not self._processing :
                     break
+                if readNow :
+                    self._removeReadNowSockets(readNow)
+                    rd = list(rd) + [ s for s in readNow if s not in rd ]
+                resumed = self._resumeReading() if self._pausedReaders else ()
+                if resumed :
+                    rd = resumed + [ s for s in rd if s not in resumed ]
                 for socketsList in ex, wr, rd :
                     for sock in socketsList :
                         if sock == self._udpSockEvt :
-                            self._udpSockEvt.recv_into(udpSockEvtBuf)
+                            try :
+                                while self._udpSockEvt.recv_into(udpSockEvtBuf) :
+                                    pass
+                            except :
+                                pass
                         else :
                             asyncSocket = self._asyncSockets.get(sock)
                             if asyncSocket and asyncSocket.GetSocketObj() == sock and sock.fileno() != -1 :
-                                if self._socketListAdd(sock, self._handlingList) :
+                                if socketsList is rd and self._microWorkers and \
+                                   ( self._pausedReaders or self._microWorkers.IsQueueFull ) and \
+                                   sock not in resumed and isinstance(asyncSocket, XAsyncTCPClient) :
+                                    # The jobs queue is full, new requests are no longer read
+                                    # but accepts, writes and timers go on,
+                                    self._pauseReading(sock)
+                                elif self._beginHandling(asyncSocket) :
                                     if socketsList is rd :
                                         if self._microWorkers :
-                                            self._microWorkers.AddJob(jobReadyForReading, (asyncSocket, sock))
+                                            self._microWorkers.AddJob(jobReadyForReading, (asyncSocket, sock), sock)
                                         else :
                                             jobReadyForReading((asyncSocket, sock))
                                     elif socketsList is wr :
-                                        self._socketListRemove(sock, self._writeList)
+                                        self._setInterest(sock, XAsyncSocketsPool._INTEREST_WRITE, False)
                                         if self._microWorkers :
-                                            self._microWorkers.AddJob(jobReadyForWriting, (asyncSocket, sock))
+                                            self._microWorkers.AddJob(jobReadyForWriting, (asyncSocket, sock), sock)
                                         else :
                                             jobReadyForWriting((asyncSocket, sock))
                                     else :
                                         self._removeSocket(sock)
                                         if self._microWorkers :
-                                            self._microWorkers.AddJob(jobExceptionalCondition, (asyncSocket, sock))
+                                            self._microWorkers.AddJob(jobExceptionalCondition, (asyncSocket, sock), sock)
                                         else :
                                             jobExceptionalCondition((asyncSocket, sock))
                             else :
                                 self._removeSocket(sock)
                                 sock.close()
-                sec = perf_counter()
-                if sec > timeSec + XAsyncSocketsPool._CHECK_SEC_INTERVAL :
-                    timeSec = sec
-                    for asyncSocket in list(self._asyncSockets.values()) :
-                        if asyncSocket.ExpireTimeSec and \
-                           timeSec > asyncSocket.ExpireTimeSec :
-                            asyncSocket._close(XClosedReason.Timeout)
             except :
                 pass
 
         if self._microWorkers :
             self._microWorkers.StopAll()
             self._microWorkers = None
+        self._stopCoroutinesLoop()
         for asyncSocket in list(self._asyncSockets.values()) :
             try :
                 asyncSocket.Close()
             except :
                 pass
 
-        self._readList.clear()
-        self._writeList.clear()
+        with self._opLock :
+            self._interests.clear()
+            self._readNowSet.clear()
+            self._pausedReaders.clear()
+            self._poller.Close()
+            self._poller = self._createPoller()
+        with self._timersLock :
+            for timer in self._timers :
+                if isinstance(timer[2], XAsyncSocket) :
+                    timer[2]._expireTimerSec = None
+                else :
+                    timer[2]._active = False
+            self._timers.clear()
+            self._nextWakeSec = None
 
         self._processing = None
 
@@ -220,10 +822,13 @@ class XAsyncSocketsPool :
         except :
             raise XAsyncSocketsPoolException('NotifyNextReadyForReading : "asyncSocket" is incorrect.')
         if notify :
-            if self._socketListAdd(socket, self._readList) :
+            if self._setInterest(socket, XAsyncSocketsPool._INTEREST_READ, True) and \
+               self._poller.NeedsWakeUp :
                 self._sendUDPSockEvent()
         else :
-            self._socketListRemove(socket, self._readList)
+            with self._opLock :
+                self._pausedReaders.pop(socket, None)
+            self._setInterest(socket, XAsyncSocketsPool._INTEREST_READ, False)
 
     # ------------------------------------------------------------------------
 
@@ -233,21 +838,141 @@ class XAsyncSocketsPool :
         except :
             raise XAsyncSocketsPoolException('NotifyNextReadyForWriting : "asyncSocket" is incorrect.')
         if notify :
-            if self._socketListAdd(socket, self._writeList) :
+            if self._setInterest(socket, XAsyncSocketsPool._INTEREST_WRITE, True) and \
+               self._poller.NeedsWakeUp :
                 self._sendUDPSockEvent()
         else :
-            self._socketListRemove(socket, self._writeList)
+            self._setInterest(socket, XAsyncSocketsPool._INTEREST_WRITE, False)
+
+    # ------------------------------------------------------------------------
+
+    def NotifyReadyForReadingNow(self, asyncSocket) :
+        try :
+            socket = asyncSocket.GetSocketObj()
+        except :
+            raise XAsyncSocketsPoolException('NotifyReadyForReadingNow : "asyncSocket" is incorrect.')
+        if self._addReadNow(socket) and not asyncSocket._handling :
+            self._sendUDPSockEvent()
+
+    # ------------------------------------------------------------------------
+
+    def CallLater(self, delaySec, onTimer, onTimerArg=None) :
+        return XAsyncTimer(self, delaySec, None, onTimer, onTimerArg)
+
+    # ------------------------------------------------------------------------
+
+    def CallEvery(self, intervalSec, onTimer, onTimerArg=None, firstDelaySec=None) :
+        if firstDelaySec is None :
+            firstDelaySec = intervalSec
+        return XAsyncTimer(self, firstDelaySec, intervalSec, onTimer, onTimerArg)
+
+    # ------------------------------------------------------------------------
+
+    def _getCoroutinesLoop(self) :
+        # Coroutines are driven by a dedicated asyncio loop thread,
+        # started the first time it is needed,
+        with self._opLock :
+            if not self._corosLoop :
+                if not asyncio :
+                    raise XAsyncSocketsPoolException('AsyncRunCoroutine : The asyncio module is not available.')
+                loop = asyncio.new_event_loop()
+                try :
+                    start_new_thread(self._runCoroutinesLoop, (loop, ))
+                except :
+                    loop.close()
+                    raise XAsyncSocketsPoolException('AsyncRunCoroutine : Fatal error to create a new thread...')
+                self._corosLoop = loop
+            return self._corosLoop
+
+    # ------------------------------------------------------------------------
+
+    def _runCoroutinesLoop(self, loop) :
+        asyncio.set_event_loop(loop)
+        try :
+            loop.run_forever()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks :
+                task.cancel()
+            if tasks :
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        except :
+            pass
+        finally :
+            loop.close()
 
     # ------------------------------------------------------------------------
 
-    def AsyncWaitEvents(self, threadsCount=0) :
+    def _stopCoroutinesLoop(self) :
+        with self._opLock :
+            loop            = self._corosLoop
+            self._corosLoop = None
+        if loop :
+            loop.call_soon_threadsafe(loop.stop)
+
+    # ------------------------------------------------------------------------
+
+    def _onCoroutineDone(self, future, onDone, onDoneArg) :
+        try :
+            result = future.result()
+            error  = None
+        except BaseException as ex :
+            result = None
+            error  = ex
+        try :
+            onDone(self, result, error, onDoneArg)
+        except :
+            pass
+
+    # ------------------------------------------------------------------------
+
+    def AsyncRunCoroutine(self, coro, onDone=None, onDoneArg=None) :
+        try :
+            loop = self._getCoroutinesLoop()
+            try :
+                running = (asyncio.get_running_loop() is loop)
+            except :
+                running = False
+            if running :
+                future = loop.create_task(coro)
+            else :
+                future = asyncio.run_coroutine_threadsafe(coro, loop)
+        except :
+            coro.close()
+            raise
+        if onDone :
+            future.add_done_callback(lambda f : self._onCoroutineDone(f, onDone, onDoneArg))
+        return future
+
+    # ------------------------------------------------------------------------
+
+    def CancelCoroutine(self, future) :
+        # Can be called from any thread, a task of the loop is cancelled
+        # from the loop itself,
+        if isinstance(future, asyncio.Future) :
+            future.get_loop().call_soon_threadsafe(future.cancel)
+        else :
+            future.cancel()
+
+    # ------------------------------------------------------------------------
+
+    def AsyncWaitEvents(self, threadsCount=0, maxQueuedJobs=None, workersAffinity=False, maxThreadsCount=None) :
         if self.WaitEventsProcessing :
             return
         self._processing = False
         if threadsCount > 0 :
+            # With "maxThreadsCount", workers are added under load and retired
+            # when idle, between "threadsCount" and "maxThreadsCount",
+            if not maxThreadsCount or maxThreadsCount < threadsCount :
+                maxThreadsCount = threadsCount
+            if maxQueuedJobs is None :
+                maxQueuedJobs = maxThreadsCount * XAsyncSocketsPool.DEFAULT_MAX_QUEUED_JOBS_PER_THREAD
             try :
-                if threadsCount > 1 :
-                    self._microWorkers = MicroWorkers(workersCount=threadsCount-1)
+                if maxThreadsCount > 1 :
+                    self._microWorkers = MicroWorkers( workersCount    = max(1, threadsCount-1),
+                                                       maxJobs         = maxQueuedJobs,
+                                                       affinity        = workersAffinity,
+                                                       maxWorkersCount = maxThreadsCount-1 )
+                    self._microWorkers.OnNotFull = self._onWorkersNotFull
                 start_new_thread(self._processWaitEvents, ())
                 while self._processing != True :
                     sleep(0.010)
@@ -262,19 +987,259 @@ class XAsyncSocketsPool :
 
     # ------------------------------------------------------------------------
 
-    def StopWaitEvents(self) :
-        if not self.WaitEventsProcessing :
-            return
-        self._processing = False
-        self._sendUDPSockEvent()
-        while self.WaitEventsProcessing :
-            sleep(0.010)
+    def StopWaitEvents(self) :
+        if not self.WaitEventsProcessing :
+            return
+        self._processing = False
+        self._sendUDPSockEvent()
+        if get_ident() == self._waitEventsThID :
+            # Stopped from the processing thread itself, that ends just after,
+            return
+        while self.WaitEventsProcessing :
+            sleep(0.010)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def WaitEventsProcessing(self) :
+        return (self._processing is not None)
+
+    @property
+    def AsyncSocketsCount(self) :
+        return len(self._asyncSockets)
+
+    @property
+    def Workers(self) :
+        return self._microWorkers
+
+    @property
+    def PollingBackend(self) :
+        return self._pollingBackend
+
+    @property
+    def EdgeTriggered(self) :
+        return self._edgeTriggered
+
+# ============================================================================
+# ===( XAsyncioSocketsPool )==================================================
+# ============================================================================
+
+class XAsyncioSocketsPool(XAsyncSocketsPool) :
+
+    def __init__(self, loop=None) :
+        if not asyncio :
+            raise XAsyncSocketsPoolException('asyncio is not available on this platform.')
+        if loop is None :
+            try :
+                loop = asyncio.get_running_loop()
+            except RuntimeError :
+                raise XAsyncSocketsPoolException('No asyncio loop is running, "loop" must be given outside of a coroutine.')
+        if not hasattr(loop, 'add_reader') or not hasattr(loop, 'call_soon_threadsafe') :
+            raise XAsyncSocketsPoolException('"loop" does not support readers and writers.')
+        self._loop         = loop
+        self._loopThreadID = None
+        self._timerHandle  = None
+        super().__init__()
+        self._pollingBackend = XPollingBackend.Asyncio
+
+    # ------------------------------------------------------------------------
+
+    def _createPoller(self) :
+        return XAsyncioPoller(self)
+
+    # ------------------------------------------------------------------------
+
+    def _createUDPSockEvent(self) :
+        # The asyncio loop is woken up by its own calls, without any socket,
+        pass
+
+    # ------------------------------------------------------------------------
+
+    def _callInLoop(self, func, *args) :
+        # The asyncio loop is not thread safe, so calls from other threads
+        # are scheduled in the loop,
+        if get_ident() == self._loopThreadID :
+            func(*args)
+        else :
+            self._loop.call_soon_threadsafe(func, *args)
+
+    # ------------------------------------------------------------------------
+
+    def _sendUDPSockEvent(self) :
+        # Timers are rescheduled instead of waking up a waiting thread,
+        self._callInLoop(self._processLoopTimers)
+
+    # ------------------------------------------------------------------------
+
+    def _getCoroutinesLoop(self) :
+        # Coroutines are driven by the asyncio loop of the pool,
+        return self._loop
+
+    # ------------------------------------------------------------------------
+
+    def _processLoopTimers(self) :
+        if self._timerHandle :
+            self._timerHandle.cancel()
+            self._timerHandle = None
+        if self._processing :
+            waitSec = self._processTimers()
+            self._timerHandle = self._loop.call_later(waitSec, self._processLoopTimers)
+
+    # ------------------------------------------------------------------------
+
+    def _dispatchEvent(self, sock, eventName) :
+        asyncSocket = self._asyncSockets.get(sock)
+        if asyncSocket and asyncSocket.GetSocketObj() == sock and sock.fileno() != -1 :
+            try :
+                if getattr(asyncSocket, eventName)() :
+                    self._removeSocket(sock)
+            except :
+                pass
+        else :
+            self._removeSocket(sock)
+            sock.close()
+
+    # ------------------------------------------------------------------------
+
+    def _onReadyForReading(self, sock) :
+        if sock not in self._readNowSet and \
+           self._poller.DropUnwantedReader(sock) :
+            return
+        self._removeReadNow(sock)
+        self._dispatchEvent(sock, 'OnReadyForReading')
+
+    # ------------------------------------------------------------------------
+
+    def _onReadyForWriting(self, sock) :
+        self._setInterest(sock, XAsyncSocketsPool._INTEREST_WRITE, False)
+        self._dispatchEvent(sock, 'OnReadyForWriting')
+
+    # ------------------------------------------------------------------------
+
+    def _onReadyForReadingNow(self, sock) :
+        if sock in self._readNowSet :
+            self._onReadyForReading(sock)
+
+    # ------------------------------------------------------------------------
+
+    def _startInLoop(self) :
+        self._loopThreadID = get_ident()
+        self._processing   = True
+        self._processLoopTimers()
+
+    # ------------------------------------------------------------------------
+
+    def _stopInLoop(self) :
+        self._processing = False
+        if self._timerHandle :
+            self._timerHandle.cancel()
+            self._timerHandle = None
+        for asyncSocket in list(self._asyncSockets.values()) :
+            try :
+                asyncSocket.Close()
+            except :
+                pass
+        with self._opLock :
+            self._interests.clear()
+            self._readNowSet.clear()
+        self._poller.Close()
+        self._processing = None
+
+    # ------------------------------------------------------------------------
+
+    def NotifyReadyForReadingNow(self, asyncSocket) :
+        try :
+            socket = asyncSocket.GetSocketObj()
+        except :
+            raise XAsyncSocketsPoolException('NotifyReadyForReadingNow : "asyncSocket" is incorrect.')
+        if self._addReadNow(socket) :
+            self._loop.call_soon_threadsafe(self._onReadyForReadingNow, socket)
+
+    # ------------------------------------------------------------------------
+
+    def AsyncWaitEvents(self, threadsCount=0, maxQueuedJobs=None, workersAffinity=False, maxThreadsCount=None) :
+        # Events are processed by the asyncio loop itself, without threads,
+        if self.WaitEventsProcessing :
+            return
+        self._processing = False
+        try :
+            running = (asyncio.get_running_loop() is self._loop)
+        except :
+            running = False
+        if running :
+            self._startInLoop()
+        else :
+            self._loop.call_soon_threadsafe(self._startInLoop)
+
+    # ------------------------------------------------------------------------
+
+    def StopWaitEvents(self) :
+        if not self.WaitEventsProcessing :
+            return
+        if get_ident() == self._loopThreadID or not self._loop.is_running() :
+            self._stopInLoop()
+        else :
+            self._loop.call_soon_threadsafe(self._stopInLoop)
+            while self.WaitEventsProcessing :
+                sleep(0.010)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def Loop(self) :
+        return self._loop
+
+# ============================================================================
+# ===( XAsyncTimer )==========================================================
+# ============================================================================
+
+class XAsyncTimerException(Exception) :
+    pass
+
+class XAsyncTimer :
+
+    def __init__(self, asyncSocketsPool, delaySec, intervalSec, onTimer, onTimerArg=None) :
+        if not isinstance(delaySec, (int, float)) or delaySec < 0 :
+            raise XAsyncTimerException('"delaySec" must be a positive number or zero.')
+        if intervalSec is not None and \
+           ( not isinstance(intervalSec, (int, float)) or intervalSec <= 0 ) :
+            raise XAsyncTimerException('"intervalSec" must be a number greater than zero or None.')
+        if not callable(onTimer) :
+            raise XAsyncTimerException('"onTimer" must be a function.')
+        self._asyncSocketsPool = asyncSocketsPool
+        self._intervalSec      = intervalSec
+        self._onTimer          = onTimer
+        self._onTimerArg       = onTimerArg
+        self._timeSec          = perf_counter() + delaySec
+        self._active           = True
+        asyncSocketsPool._scheduleTimer(self._timeSec, self)
+
+    # ------------------------------------------------------------------------
+
+    def _fire(self, arg=None) :
+        try :
+            self._onTimer(self, self._onTimerArg)
+        except :
+            pass
+
+    # ------------------------------------------------------------------------
+
+    def Cancel(self) :
+        self._active = False
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def IsActive(self) :
+        return self._active
 
-    # ------------------------------------------------------------------------
+    @property
+    def IntervalSec(self) :
+        return self._intervalSec
 
     @property
-    def WaitEventsProcessing(self) :
-        return (self._processing is not None)
+    def NextTimeSec(self) :
+        return self._timeSec if self._active else None
 
 # ============================================================================
 # ===( XClosedReason )========================================================
@@ -287,6 +1252,16 @@ class XClosedReason() :
     ClosedByPeer = 0x02
     Timeout      = 0x03
 
+# ============================================================================
+# ===( XOverloadPolicy )======================================================
+# ============================================================================
+
+class XOverloadPolicy() :
+
+    Close   = 0x00
+    Respond = 0x01
+    Queue   = 0x02
+
 # ============================================================================
 # ===( XAsyncSocket )=========================================================
 # ============================================================================
@@ -304,6 +1279,11 @@ class XAsyncSocket :
         self._recvBufSlot      = recvBufSlot
         self._sendBufSlot      = sendBufSlot
         self._expireTimeSec    = None
+        self._expireTimerSec   = None
+        self._stateLock        = allocate_lock()
+        self._handling         = False
+        self._pendingClose     = None
+        self._closed           = False
         self._state            = None
         self._onClosed         = None
         try :
@@ -322,6 +1302,7 @@ class XAsyncSocket :
         try :
             if timeoutSec and timeoutSec > 0 :
                 self._expireTimeSec = perf_counter() + timeoutSec
+                self._asyncSocketsPool._scheduleExpireTimeout(self, self._expireTimeSec)
         except :
             raise XAsyncSocketException('"timeoutSec" is incorrect to set expire timeout.')
 
@@ -334,16 +1315,19 @@ class XAsyncSocket :
 
     def _close(self, closedReason=XClosedReason.Error, triggerOnClosed=True) :
         if self._asyncSocketsPool.RemoveAsyncSocket(self) :
+            self._expireTimeSec = None
             try :
                 self._socket.close()
             except :
                 pass
-            if self._recvBufSlot is not None :
-                self._recvBufSlot.Available = True
-                self._recvBufSlot = None
-            if self._sendBufSlot is not None :
-                self._sendBufSlot.Available = True
-                self._sendBufSlot = None
+            with self._stateLock :
+                self._closed = True
+                recvBufSlot, self._recvBufSlot = self._recvBufSlot, None
+                sendBufSlot, self._sendBufSlot = self._sendBufSlot, None
+            if recvBufSlot is not None :
+                recvBufSlot.Available = True
+            if sendBufSlot is not None :
+                sendBufSlot.Available = True
             if triggerOnClosed and self._onClosed :
                 try :
                     self._onClosed(self, closedReason)
@@ -416,65 +1400,394 @@ class XAsyncTCPServerException(Exception) :
 
 class XAsyncTCPServer(XAsyncSocket) :
 
+    DEFAULT_ACCEPT_BATCH_MAX    = 64
+    DEFAULT_PENDING_MAX         = 16
+    DEFAULT_PENDING_TIMEOUT_SEC = 1.0
+
+    _ACCEPT_RATE_SEC_INTERVAL = 1.0
+    _PENDING_CHECK_SEC        = 0.1
+    _LINGER_CHECK_SEC         = 0.1
+    _LINGER_TIMEOUT_SEC       = 2.0
+    _LINGER_MAX               = 64
+    _LINGER_RECV_SIZE         = 4096
+
     @staticmethod
-    def Create(asyncSocketsPool, srvAddr, srvBacklog=256, bufSlots=None) :
-        try :
-            srvSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        except :
-            raise XAsyncTCPServerException('Create : Cannot open socket (no enought memory).')
-        try :
-            srvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            srvSocket.bind(srvAddr)
-            srvSocket.listen(srvBacklog)
-        except :
-            raise XAsyncTCPServerException('Create : Error to binding the TCP server on this address.')
+    def _getSocketOptions(sockOptions) :
+        # Returns the options of the listening socket and the ones of the
+        # accepted sockets as lists of (level, option, value), only for the
+        # options supported by the platform,
+        srvOpts = [ ]
+        cliOpts = [ ]
+        if not sockOptions :
+            return srvOpts, cliOpts
+        tcpLevel = getattr(socket, 'IPPROTO_TCP', 6)
+        def addOpt(opts, level, name, value) :
+            opt = getattr(socket, name, None)
+            if opt is not None and value is not None :
+                opts.append( (level, opt, value) )
+        addOpt(srvOpts, socket.SOL_SOCKET, 'SO_SNDBUF',        sockOptions.get('sendBufSize'))
+        addOpt(srvOpts, socket.SOL_SOCKET, 'SO_RCVBUF',        sockOptions.get('recvBufSize'))
+        addOpt(srvOpts, tcpLevel,          'TCP_DEFER_ACCEPT', sockOptions.get('deferAcceptSec'))
+        addOpt(srvOpts, tcpLevel,          'TCP_FASTOPEN',     sockOptions.get('fastOpenQueueLen'))
+        if sockOptions.get('noDelay') :
+            addOpt(cliOpts, tcpLevel, 'TCP_NODELAY', 1)
+        if sockOptions.get('quickAck') :
+            addOpt(cliOpts, tcpLevel, 'TCP_QUICKACK', 1)
+        keepAlive = sockOptions.get('keepAlive')
+        if keepAlive :
+            idleSec, intervalSec, count = keepAlive
+            addOpt(cliOpts, socket.SOL_SOCKET, 'SO_KEEPALIVE', 1)
+            if hasattr(socket, 'TCP_KEEPIDLE') :
+                addOpt(cliOpts, tcpLevel, 'TCP_KEEPIDLE', idleSec)
+            else :
+                # On macOS, the idle time is set by TCP_KEEPALIVE,
+                addOpt(cliOpts, tcpLevel, 'TCP_KEEPALIVE', idleSec)
+            addOpt(cliOpts, tcpLevel, 'TCP_KEEPINTVL', intervalSec)
+            addOpt(cliOpts, tcpLevel, 'TCP_KEEPCNT',   count)
+        return srvOpts, cliOpts
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _setSocketOptions(sock, opts) :
+        for level, opt, value in opts :
+            try :
+                sock.setsockopt(level, opt, value)
+            except :
+                # The option is not supported by this kernel,
+                pass
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def Create( asyncSocketsPool,
+                srvAddr,
+                srvBacklog  = 256,
+                bufSlots    = None,
+                bufPools    = None,
+                reusePort   = False,
+                srvSocket   = None,
+                sockOptions = None ) :
+        # "srvSocket" can be an already bound and listening socket,
+        # such as one inherited from a parent process,
+        srvOpts, cliOpts = XAsyncTCPServer._getSocketOptions(sockOptions)
+        if srvSocket :
+            XAsyncTCPServer._setSocketOptions(srvSocket, srvOpts)
+        else :
+            if reusePort and not hasattr(socket, 'SO_REUSEPORT') :
+                raise XAsyncTCPServerException('Create : SO_REUSEPORT is not supported on this platform.')
+            try :
+                srvSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            except :
+                raise XAsyncTCPServerException('Create : Cannot open socket (no enought memory).')
+            try :
+                srvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                if reusePort :
+                    # Several servers can be bound on the same address,
+                    # incoming connections are distributed between them by the kernel,
+                    srvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                XAsyncTCPServer._setSocketOptions(srvSocket, srvOpts)
+                srvSocket.bind(srvAddr)
+                srvSocket.listen(srvBacklog)
+            except :
+                raise XAsyncTCPServerException('Create : Error to binding the TCP server on this address.')
         if not bufSlots :
             bufSlots = XBufferSlots(256, 4096, keepAlloc=True)
         xAsyncTCPServer = XAsyncTCPServer( asyncSocketsPool,
                                            srvSocket,
                                            srvAddr,
-                                           bufSlots )
+                                           bufSlots,
+                                           bufPools,
+                                           cliOpts )
         asyncSocketsPool.NotifyNextReadyForReading(xAsyncTCPServer, True)
         return xAsyncTCPServer
 
     # ------------------------------------------------------------------------
 
-    def __init__(self, asyncSocketsPool, srvSocket, srvAddr, bufSlots) :
+    def __init__(self, asyncSocketsPool, srvSocket, srvAddr, bufSlots, bufPools=None, cliSockOpts=None) :
         try :
             super().__init__(asyncSocketsPool, srvSocket)
             self._srvAddr          = srvAddr
             self._bufSlots         = bufSlots
+            self._bufPools         = bufPools
+            self._cliSockOpts      = cliSockOpts
             self._onClientAccepted = None
+            self._acceptBatchMax   = XAsyncTCPServer.DEFAULT_ACCEPT_BATCH_MAX
+            self._acceptedCount    = 0
+            self._rejectedCount    = 0
+            self._batchesCount     = 0
+            self._maxBatchCount    = 0
+            self._rateStartSec     = perf_counter()
+            self._rateCount        = 0
+            self._acceptRate       = 0.0
+            self._overloadPolicy   = XOverloadPolicy.Close
+            self._overloadResponse = None
+            self._pendingMax       = XAsyncTCPServer.DEFAULT_PENDING_MAX
+            self._pendingTimeout   = XAsyncTCPServer.DEFAULT_PENDING_TIMEOUT_SEC
+            self._pendingAccepts   = deque()
+            self._pendingLock      = allocate_lock()
+            self._pendingTimer     = None
+            self._pendingScheduled = False
+            self._queuedCount      = 0
+            self._queueWaitSec     = 0.0
+            self._queueWaitMaxSec  = 0.0
+            self._shedOnOverload   = False
+            self._shedCount        = 0
+            self._lingering        = deque()
+            self._lingerTimer      = None
+            bufSlots._onRelease    = self._onSlotReleased
         except :
             raise XAsyncTCPServerException('Error to creating XAsyncTCPServer, arguments are incorrects.')
 
     # ------------------------------------------------------------------------
 
-    def OnReadyForReading(self) :
+    def _close(self, closedReason=XClosedReason.Error, triggerOnClosed=True) :
+        if super()._close(closedReason, triggerOnClosed) :
+            with self._pendingLock :
+                pending = list(self._pendingAccepts)
+                self._pendingAccepts.clear()
+                if self._pendingTimer :
+                    self._pendingTimer.Cancel()
+                    self._pendingTimer = None
+                pending.extend(self._lingering)
+                self._lingering.clear()
+                if self._lingerTimer :
+                    self._lingerTimer.Cancel()
+                    self._lingerTimer = None
+            for item in pending :
+                try :
+                    item[0].close()
+                except :
+                    pass
+            return True
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def _acceptClient(self) :
+        # Returns False when no more connection is waiting to be accepted,
         try :
             cliSocket, cliAddr = self._socket.accept()
         except :
-            return
-        recvBufSlot = self._bufSlots.GetAvailableSlot()
-        sendBufSlot = self._bufSlots.GetAvailableSlot()
-        if not recvBufSlot or not sendBufSlot or not self._onClientAccepted :
-            if recvBufSlot :
-                recvBufSlot.Available = True
-            if sendBufSlot :
-                sendBufSlot.Available = True
+            return False
+        if not self._onClientAccepted :
             cliSocket.close()
-            return
+            self._rejectedCount += 1
+        elif self._shedOnOverload and self._isWorkersOverloaded() :
+            # The workers are late on their jobs, so the connection is answered
+            # at once instead of queuing more work for it,
+            self._shedCount += 1
+            self._refuseClient(cliSocket, respond=True)
+        elif self._bufSlots.AvailableSlotsCount == 0 or self._pendingAccepts :
+            # All buffer slots are in use, or connections are already waiting
+            # for them, so the overload policy is applied,
+            self._onOverload(cliSocket, cliAddr)
+        else :
+            self._startClient(cliSocket, cliAddr)
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _startClient(self, cliSocket, cliAddr) :
+        if self._cliSockOpts :
+            XAsyncTCPServer._setSocketOptions(cliSocket, self._cliSockOpts)
+        # Buffer slots are only taken by the client when data is received or
+        # sent, so that idle connections do not hold any of them,
         asyncTCPCli = XAsyncTCPClient( self._asyncSocketsPool,
                                        cliSocket,
                                        self._srvAddr,
                                        cliAddr,
-                                       recvBufSlot,
-                                       sendBufSlot )
+                                       None,
+                                       None,
+                                       self._bufPools,
+                                       self._bufSlots )
+        self._acceptedCount += 1
         try :
             self._onClientAccepted(self, asyncTCPCli)
         except Exception as ex :
             asyncTCPCli._close()
             raise XAsyncTCPServerException('Error when handling the "OnClientAccepted" event : %s' % ex)
+        # The first data is often already received with the connection, so
+        # the client is read without waiting for the next polling round,
+        cliSocket = asyncTCPCli.GetSocketObj()
+        if self._asyncSocketsPool.GetAsyncSocketByID(cliSocket) is asyncTCPCli :
+            self._asyncSocketsPool.NotifyReadyForReadingNow(asyncTCPCli)
+
+    # ------------------------------------------------------------------------
+
+    def _onOverload(self, cliSocket, cliAddr) :
+        if self._overloadPolicy == XOverloadPolicy.Queue :
+            with self._pendingLock :
+                if len(self._pendingAccepts) < self._pendingMax :
+                    self._pendingAccepts.append( (cliSocket, cliAddr, perf_counter()) )
+                    if not self._pendingTimer :
+                        self._pendingTimer = self._asyncSocketsPool.CallEvery( XAsyncTCPServer._PENDING_CHECK_SEC,
+                                                                               self._onPendingTimer )
+                    return
+        self._refuseClient(cliSocket)
+
+    # ------------------------------------------------------------------------
+
+    def _isWorkersOverloaded(self) :
+        workers = self._asyncSocketsPool.Workers
+        return (workers is not None and workers.IsOverloaded)
+
+    # ------------------------------------------------------------------------
+
+    def _refuseClient(self, cliSocket, respond=None) :
+        # The overload response is a static buffer sent without waiting, the
+        # connection then lingers until the peer closes it, so that closing
+        # with unread request data does not reset it before the response is
+        # received,
+        self._rejectedCount += 1
+        if respond is None :
+            respond = (self._overloadPolicy != XOverloadPolicy.Close)
+        try :
+            if self._overloadResponse and respond :
+                cliSocket.setblocking(0)
+                cliSocket.send(self._overloadResponse)
+                cliSocket.shutdown(socket.SHUT_WR)
+                if not XAsyncTCPServer._drainLingering(cliSocket) :
+                    self._addLingering(cliSocket)
+                    return
+        except :
+            pass
+        try :
+            cliSocket.close()
+        except :
+            pass
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _drainLingering(cliSocket) :
+        # Reads out the data received on a refused connection and returns
+        # True once it is closed by peer or fails,
+        try :
+            for i in range(16) :
+                if not cliSocket.recv(XAsyncTCPServer._LINGER_RECV_SIZE) :
+                    return True
+            return False
+        except Exception as ex :
+            return not ( isinstance(ex, OSError) and ex.args and \
+                         ex.args[0] in _WOULD_BLOCK_ERRNOS )
+
+    # ------------------------------------------------------------------------
+
+    def _addLingering(self, cliSocket) :
+        oldest = None
+        with self._pendingLock :
+            if len(self._lingering) >= XAsyncTCPServer._LINGER_MAX :
+                oldest = self._lingering.popleft()
+            self._lingering.append( (cliSocket, perf_counter()) )
+            if not self._lingerTimer :
+                self._lingerTimer = self._asyncSocketsPool.CallEvery( XAsyncTCPServer._LINGER_CHECK_SEC,
+                                                                      self._onLingerTimer )
+        if oldest :
+            try :
+                oldest[0].close()
+            except :
+                pass
+
+    # ------------------------------------------------------------------------
+
+    def _onLingerTimer(self, timer, arg) :
+        # Refused connections are closed when the peer has closed them too,
+        # or after a short delay,
+        nowSec = perf_counter()
+        closed = [ ]
+        with self._pendingLock :
+            for i in range(len(self._lingering)) :
+                item = self._lingering.popleft()
+                if XAsyncTCPServer._drainLingering(item[0]) or \
+                   nowSec - item[1] >= XAsyncTCPServer._LINGER_TIMEOUT_SEC :
+                    closed.append(item[0])
+                else :
+                    self._lingering.append(item)
+            if not self._lingering and self._lingerTimer :
+                self._lingerTimer.Cancel()
+                self._lingerTimer = None
+        for cliSocket in closed :
+            try :
+                cliSocket.close()
+            except :
+                pass
+
+    # ------------------------------------------------------------------------
+
+    def _onSlotReleased(self) :
+        # Called by any thread releasing a buffer slot, the pending accepts
+        # are then processed by the pool,
+        if self._pendingAccepts and not self._pendingScheduled :
+            self._pendingScheduled = True
+            self._asyncSocketsPool.CallLater(0, self._onPendingTimer)
+
+    # ------------------------------------------------------------------------
+
+    def _onPendingTimer(self, timer, arg) :
+        if timer is not self._pendingTimer :
+            self._pendingScheduled = False
+        self._processPendingAccepts()
+
+    # ------------------------------------------------------------------------
+
+    def _processPendingAccepts(self) :
+        # Connections are started in their order of arrival as soon as
+        # buffer slots are available, or refused after waiting too long,
+        while True :
+            with self._pendingLock :
+                if not self._pendingAccepts :
+                    if self._pendingTimer :
+                        self._pendingTimer.Cancel()
+                        self._pendingTimer = None
+                    return
+                cliSocket, cliAddr, timeSec = self._pendingAccepts[0]
+                waitSec = perf_counter() - timeSec
+                expired = (waitSec >= self._pendingTimeout)
+                if not expired and self._bufSlots.AvailableSlotsCount == 0 :
+                    return
+                self._pendingAccepts.popleft()
+                if not expired :
+                    self._queuedCount  += 1
+                    self._queueWaitSec += waitSec
+                    if waitSec > self._queueWaitMaxSec :
+                        self._queueWaitMaxSec = waitSec
+            if expired :
+                self._refuseClient(cliSocket)
+            else :
+                try :
+                    self._startClient(cliSocket, cliAddr)
+                except :
+                    pass
+
+    # ------------------------------------------------------------------------
+
+    def _updateAcceptStats(self, count) :
+        self._batchesCount += 1
+        if count > self._maxBatchCount :
+            self._maxBatchCount = count
+        self._rateCount += count
+        nowSec     = perf_counter()
+        elapsedSec = nowSec - self._rateStartSec
+        if elapsedSec >= XAsyncTCPServer._ACCEPT_RATE_SEC_INTERVAL :
+            self._acceptRate   = self._rateCount / elapsedSec
+            self._rateStartSec = nowSec
+            self._rateCount    = 0
+
+    # ------------------------------------------------------------------------
+
+    def OnReadyForReading(self) :
+        # Waiting connections are accepted in a bounded batch per event, to
+        # absorb connection storms without starving the other sockets,
+        count = 0
+        if self._pendingAccepts :
+            self._processPendingAccepts()
+        try :
+            while count < self._acceptBatchMax and self._acceptClient() :
+                count += 1
+        finally :
+            if count :
+                self._updateAcceptStats(count)
 
     # ------------------------------------------------------------------------
 
@@ -482,6 +1795,85 @@ class XAsyncTCPServer(XAsyncSocket) :
     def SrvAddr(self) :
         return self._srvAddr
 
+    @property
+    def BufferPools(self) :
+        return self._bufPools
+
+    @property
+    def AcceptBatchMax(self) :
+        return self._acceptBatchMax
+    @AcceptBatchMax.setter
+    def AcceptBatchMax(self, value) :
+        if not isinstance(value, int) or value <= 0 :
+            raise XAsyncTCPServerException('"AcceptBatchMax" must be an integer greater than zero.')
+        self._acceptBatchMax = value
+
+    @property
+    def AcceptStats(self) :
+        # The accept rate is the count of connections per second, measured
+        # over the last elapsed interval,
+        if perf_counter() - self._rateStartSec >= 2 * XAsyncTCPServer._ACCEPT_RATE_SEC_INTERVAL :
+            acceptRate = 0.0
+        else :
+            acceptRate = self._acceptRate
+        queued = self._queuedCount
+        return { 'accepted'        : self._acceptedCount,
+                 'rejected'        : self._rejectedCount,
+                 'batches'         : self._batchesCount,
+                 'maxBatch'        : self._maxBatchCount,
+                 'acceptRate'      : acceptRate,
+                 'pending'         : len(self._pendingAccepts),
+                 'queued'          : queued,
+                 'queueWaitAvgSec' : (self._queueWaitSec / queued) if queued else 0.0,
+                 'queueWaitMaxSec' : self._queueWaitMaxSec,
+                 'shed'            : self._shedCount,
+                 'slotWaits'       : self._bufSlots.WaitsCount }
+
+    @property
+    def OverloadPolicy(self) :
+        return self._overloadPolicy
+    @OverloadPolicy.setter
+    def OverloadPolicy(self, value) :
+        if value not in ( XOverloadPolicy.Close,
+                          XOverloadPolicy.Respond,
+                          XOverloadPolicy.Queue ) :
+            raise XAsyncTCPServerException('"OverloadPolicy" must be a XOverloadPolicy value.')
+        self._overloadPolicy = value
+
+    @property
+    def OverloadResponse(self) :
+        return self._overloadResponse
+    @OverloadResponse.setter
+    def OverloadResponse(self, value) :
+        self._overloadResponse = bytes(value) if value else None
+
+    @property
+    def PendingAcceptsMax(self) :
+        return self._pendingMax
+    @PendingAcceptsMax.setter
+    def PendingAcceptsMax(self, value) :
+        if not isinstance(value, int) or value < 0 :
+            raise XAsyncTCPServerException('"PendingAcceptsMax" must be a positive integer or zero.')
+        self._pendingMax = value
+
+    @property
+    def PendingAcceptTimeoutSec(self) :
+        return self._pendingTimeout
+    @PendingAcceptTimeoutSec.setter
+    def PendingAcceptTimeoutSec(self, value) :
+        if not isinstance(value, (int, float)) or value <= 0 :
+            raise XAsyncTCPServerException('"PendingAcceptTimeoutSec" must be a number greater than zero.')
+        self._pendingTimeout = value
+
+    @property
+    def ShedOnWorkersOverload(self) :
+        return self._shedOnOverload
+    @ShedOnWorkersOverload.setter
+    def ShedOnWorkersOverload(self, value) :
+        if not isinstance(value, bool) :
+            raise XAsyncTCPServerException('"ShedOnWorkersOverload" must be a boolean.')
+        self._shedOnOverload = value
+
     @property
     def OnClientAccepted(self) :
         return self._onClientAccepted
@@ -498,6 +1890,11 @@ class XAsyncTCPClientException(Exception) :
 
 class XAsyncTCPClient(XAsyncSocket) :
 
+    DEFAULT_SEND_HIGH_WATERMARK = 64*1024
+    DEFAULT_SEND_LOW_WATERMARK  = 16*1024
+
+    _SENDMSG_MAX_BUFFERS        = 64
+
     @staticmethod
     def Create( asyncSocketsPool,
                 srvAddr,
@@ -562,22 +1959,39 @@ class XAsyncTCPClient(XAsyncSocket) :
 
     # ------------------------------------------------------------------------
 
-    def __init__(self, asyncSocketsPool, cliSocket, srvAddr, cliAddr, recvBufSlot, sendBufSlot) :
+    def __init__(self, asyncSocketsPool, cliSocket, srvAddr, cliAddr, recvBufSlot, sendBufSlot, bufPools=None, bufSlots=None) :
         try :
             super().__init__(asyncSocketsPool, cliSocket, recvBufSlot, sendBufSlot)
+            self._bufPools         = bufPools
+            self._bufSlots         = bufSlots
+            self._recvSlotSize     = recvBufSlot.Size if recvBufSlot else bufSlots.SlotsSize
+            self._sendSlotSize     = sendBufSlot.Size if sendBufSlot else bufSlots.SlotsSize
             self._srvAddr          = srvAddr
             self._cliAddr          = cliAddr if cliAddr else ('0.0.0.0', 0)
             self._onFailsToConnect = None
             self._onConnected      = None
             self._onDataRecv       = None
             self._onDataRecvArg    = None
-            self._onDataSent       = None
-            self._onDataSentArg    = None
+            self._wrQueue          = deque()
+            self._wrQueueLen       = 0
+            self._wrCallbacksCount = 0
+            self._wrSendingBufUsed = False
+            self._sendBufRefs      = 0
+            self._wrQueueFull      = False
+            self._wrHighWatermark  = XAsyncTCPClient.DEFAULT_SEND_HIGH_WATERMARK
+            self._wrLowWatermark   = XAsyncTCPClient.DEFAULT_SEND_LOW_WATERMARK
+            self._wrLock           = allocate_lock()
             self._sizeToRecv       = None
             self._rdLinePos        = None
             self._rdLineEncoding   = None
             self._rdBufView        = None
-            self._wrBufView        = None
+            self._rdPoolBuf        = None
+            self._rdBufStart       = 0
+            self._rdBufEnd         = 0
+            self._inRecvHandler    = False
+            self._watchClosed      = False
+            self._sslHandshaking   = False
+            self._onSSLStarted     = None
             self._socketOpened     = (cliAddr is not None)
         except :
             raise XAsyncTCPClientException('Error to creating XAsyncTCPClient, arguments are incorrects.')
@@ -585,11 +1999,13 @@ class XAsyncTCPClient(XAsyncSocket) :
     # ------------------------------------------------------------------------
 
     def Close(self) :
-        if self._wrBufView :
-            try :
-                self._socket.send(self._wrBufView)
-            except :
-                pass
+        try :
+            for item in self._wrQueue :
+                if item[4] :
+                    break
+                self._socket.send(item[0])
+        except :
+            pass
         try :
             self._socket.shutdown(socket.SHUT_RDWR)
         except :
@@ -598,106 +2014,297 @@ class XAsyncTCPClient(XAsyncSocket) :
 
     # ------------------------------------------------------------------------
 
+    def _close(self, closedReason=XClosedReason.Error, triggerOnClosed=True) :
+        if super()._close(closedReason, triggerOnClosed) :
+            self._releasePooledBuffers()
+            return True
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def _releasePooledBuffers(self) :
+        if self._bufPools is None :
+            return
+        poolBuf = None
+        with self._wrLock :
+            for item in self._wrQueue :
+                if item[5] is not None :
+                    self._bufPools.Put(item[5])
+                    item[5] = None
+            # The receiving buffer is released by the receiving handler itself
+            # if it is in progress,
+            if not self._inRecvHandler :
+                poolBuf, self._rdPoolBuf = self._rdPoolBuf, None
+        if poolBuf is not None :
+            self._bufPools.Put(poolBuf)
+
+    # ------------------------------------------------------------------------
+
+    def _acquireBufSlot(self, size, onAvailable=None) :
+        # A slot is taken from the slots of the server, and is None when they
+        # are all in use, a client without server allocates its own slot,
+        if self._bufSlots :
+            return self._bufSlots.GetAvailableSlot(onAvailable)
+        return XBufferSlot(size=size, keepAlloc=False)
+
+    # ------------------------------------------------------------------------
+
+    def _getRecvBufSlot(self) :
+        slot = self._recvBufSlot
+        if slot is None :
+            slot = self._acquireBufSlot(self._recvSlotSize)
+            if slot is None :
+                # Reading is suspended until a slot of the server is released,
+                # the interest is removed before waiting to not lose the wake up,
+                self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
+                slot = self._acquireBufSlot(self._recvSlotSize, self._onRecvBufSlotAvailable)
+                if slot is None :
+                    return None
+                self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+            with self._stateLock :
+                if not self._closed :
+                    self._recvBufSlot = slot
+                    return slot
+            slot.Available = True
+            return None
+        return slot
+
+    # ------------------------------------------------------------------------
+
+    def _getSendBufSlot(self) :
+        slot = self._sendBufSlot
+        if slot is None :
+            slot = self._acquireBufSlot(self._sendSlotSize)
+            if slot is None :
+                return None
+            with self._stateLock :
+                if not self._closed :
+                    self._sendBufSlot = slot
+                    return slot
+            slot.Available = True
+            return None
+        return slot
+
+    # ------------------------------------------------------------------------
+
+    def _onRecvBufSlotAvailable(self) :
+        # Called by the thread releasing a slot of the server, the reading is
+        # resumed and the slot is taken again when ready for reading,
+        if self._closed :
+            return False
+        self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _releaseIdleRecvBufSlot(self) :
+        # A slot of the server is given back as soon as no received data is
+        # left in it, slots allocated with the client are kept,
+        slot = self._recvBufSlot
+        if slot is not None and slot._owner is not None and \
+           self._rdBufEnd == self._rdBufStart :
+            with self._stateLock :
+                slot, self._recvBufSlot = self._recvBufSlot, None
+            if slot is not None :
+                self._rdBufStart = 0
+                self._rdBufEnd   = 0
+                slot.Available   = True
+
+    # ------------------------------------------------------------------------
+
+    def _recvInto(self, buf) :
+        # Returns the received size, 0 if the connection is closed by peer,
+        # or None if no more data can be received without blocking.
+        try :
+            if hasattr(self._socket, 'recv_into') :
+                return self._socket.recv_into(buf)
+            return self._socket.readinto(buf)
+        except Exception as ex :
+            if hasattr(ssl, 'SSLError') and isinstance(ex, ssl.SSLError) :
+                if ex.args[0] == ssl.SSL_ERROR_WANT_READ :
+                    return None
+            elif isinstance(ex, OSError) and ex.args and ex.args[0] in _WOULD_BLOCK_ERRNOS :
+                return None
+            raise ex
+
+    # ------------------------------------------------------------------------
+
+    def _recvAhead(self) :
+        # Receives as much data as possible at the end of the read-ahead
+        # buffer (the recv buffer slot) and returns the received size.
+        slot = self._getRecvBufSlot()
+        if slot is None :
+            return 0 if self._closed else None
+        buf  = slot.Buffer
+        if self._rdBufStart > 0 and self._rdBufEnd == len(buf) :
+            n = self._rdBufEnd - self._rdBufStart
+            buf[:n] = buf[self._rdBufStart:self._rdBufEnd]
+            self._rdBufStart = 0
+            self._rdBufEnd   = n
+        return self._recvInto(memoryview(buf)[self._rdBufEnd:])
+
+    # ------------------------------------------------------------------------
+
+    def _consumeRecvBuf(self, size) :
+        self._rdBufStart += size
+        if self._rdBufStart == self._rdBufEnd :
+            self._rdBufStart = 0
+            self._rdBufEnd   = 0
+
+    # ------------------------------------------------------------------------
+
+    def _findLineEnd(self) :
+        if self._recvBufSlot is None :
+            return -1
+        start = self._rdBufStart + self._rdLinePos
+        try :
+            return self._recvBufSlot._find(b'\n', start, self._rdBufEnd)
+        except AttributeError :
+            buf = self._recvBufSlot.Buffer
+            idx = bytes(buf[start:self._rdBufEnd]).find(b'\n')
+            return (start + idx) if idx >= 0 else idx
+
+    # ------------------------------------------------------------------------
+
+    def _onDataRecvCompleted(self, data) :
+        self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
+        self._removeExpireTimeout()
+        if self._onDataRecv :
+            try :
+                self._onDataRecv(self, data, self._onDataRecvArg)
+            except Exception as ex :
+                raise XAsyncTCPClientException('Error when handling the "OnDataRecv" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
     def OnReadyForReading(self) :
-        while True :
-            if self._rdLinePos is not None :
-                # In the context of reading a line,
-                while True :
-                    try :
+        # Data is read in large blocks into the recv buffer slot used as a
+        # read-ahead buffer, and the remaining bytes are kept for the next
+        # asynchronous receive.
+        if self._sslHandshaking :
+            self._continueSSLHandshake()
+            return
+        with self._wrLock :
+            self._inRecvHandler = True
+        try :
+            canRecv = True
+            while not self._closed :
+                if self._rdLinePos is not None :
+                    # In the context of reading a line,
+                    idx = self._findLineEnd()
+                    if idx >= 0 :
+                        buf  = self._recvBufSlot.Buffer
+                        line = bytes(memoryview(buf)[self._rdBufStart:idx]).replace(b'\r', b'')
+                        self._consumeRecvBuf(idx + 1 - self._rdBufStart)
+                        self._rdLinePos = None
                         try :
-                            b = self._socket.recv(1)
-                        except ssl.SSLError as sslErr :
-                            if sslErr.args[0] != ssl.SSL_ERROR_WANT_READ :
-                                self._close()
-                            return
-                        except BlockingIOError as bioErr :
-                            if bioErr.errno != 35 :
-                                self._close()
-                            return
+                            line = line.decode(self._rdLineEncoding)
                         except :
-                            self._close()
-                            return
-                    except :
+                            line = None
+                        self._onDataRecvCompleted(line)
+                        continue
+                    self._rdLinePos = self._rdBufEnd - self._rdBufStart
+                    if self._rdLinePos >= self._recvSlotSize :
                         self._close()
                         return
-                    if b :
-                        if b == b'\n' :
-                            lineLen = self._rdLinePos 
-                            self._rdLinePos = None
-                            self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
-                            self._removeExpireTimeout()
-                            if self._onDataRecv :
-                                line = self._recvBufSlot.Buffer[:lineLen]
-                                try :
-                                    line = bytes(line).decode(self._rdLineEncoding)
-                                except :
-                                    line = None
-                                try :
-                                    self._onDataRecv(self, line, self._onDataRecvArg)
-                                except Exception as ex :
-                                    raise XAsyncTCPClientException('Error when handling the "OnDataRecv" event : %s' % ex)
-                            if self.IsSSL and self._socket.pending() > 0 :
-                                break
-                            return
-                        elif b != b'\r' :
+                elif self._sizeToRecv :
+                    # In the context of reading data,
+                    buffered = self._rdBufEnd - self._rdBufStart
+                    if self._rdBufView is None :
+                        # Data fits in the recv buffer slot,
+                        if buffered >= self._sizeToRecv :
+                            size = self._sizeToRecv
+                            data = memoryview(self._recvBufSlot.Buffer)[self._rdBufStart:self._rdBufStart+size]
+                            self._consumeRecvBuf(size)
+                            self._sizeToRecv = None
+                            self._onDataRecvCompleted(data)
+                            continue
+                        if buffered and self._rdBufStart + self._sizeToRecv > self._recvSlotSize :
+                            buf = self._recvBufSlot.Buffer
+                            buf[:buffered]   = buf[self._rdBufStart:self._rdBufEnd]
+                            self._rdBufStart = 0
+                            self._rdBufEnd   = buffered
+                    else :
+                        # Data is received directly into a dedicated buffer,
+                        if buffered :
+                            n    = min(buffered, self._sizeToRecv)
+                            pos  = len(self._rdBufView) - self._sizeToRecv
+                            self._rdBufView[pos:pos+n] = memoryview(self._recvBufSlot.Buffer)[self._rdBufStart:self._rdBufStart+n]
+                            self._consumeRecvBuf(n)
+                            self._sizeToRecv -= n
+                        elif canRecv :
                             try :
-                                if self._rdLinePos < self._recvBufSlot.Size :
-                                    self._recvBufSlot.Buffer[self._rdLinePos] = ord(b)
-                                    self._rdLinePos += 1
-                                else :
-                                    self._close()
-                                    return
+                                n = self._recvInto(self._rdBufView[-self._sizeToRecv:])
                             except :
+                                self._close()
                                 return
-                    else :
-                        self._close(XClosedReason.ClosedByPeer)
-                        return
-            elif self._sizeToRecv :
-                # In the context of reading data,
-                recvBuf = self._rdBufView[-self._sizeToRecv:]
-                try :
-                    try :
-                        n = self._socket.recv_into(recvBuf)
-                    except ssl.SSLError as sslErr :
-                        if sslErr.args[0] != ssl.SSL_ERROR_WANT_READ :
-                            self._close()
-                        return
-                    except BlockingIOError as bioErr :
-                        if bioErr.errno != 35 :
-                            self._close()
+                            if n is None :
+                                return
+                            if not n :
+                                self._close(XClosedReason.ClosedByPeer)
+                                return
+                            self._sizeToRecv -= n
+                            if self._sizeToRecv :
+                                canRecv = self.IsSSL
+                        else :
+                            return
+                        if not self._sizeToRecv :
+                            data    = self._rdBufView
+                            poolBuf = self._rdPoolBuf
+                            self._rdBufView  = None
+                            self._rdPoolBuf  = None
+                            self._sizeToRecv = None
+                            try :
+                                self._onDataRecvCompleted(data)
+                            finally :
+                                # Received data is only valid during the
+                                # "OnDataRecv" event,
+                                if poolBuf is not None :
+                                    self._bufPools.Put(poolBuf)
+                        continue
+                else :
+                    # Without any receive, data is only read ahead while the
+                    # closing is watched and until the buffer is full,
+                    if not self._watchClosed :
                         return
-                    except :
-                        self._close()
+                    if self._rdBufEnd - self._rdBufStart >= self._recvSlotSize :
+                        self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
                         return
+                if not canRecv :
+                    return
+                try :
+                    n = self._recvAhead()
                 except :
-                    try :
-                        n = self._socket.readinto(recvBuf)
-                    except :
-                        self._close()
-                        return
+                    self._close()
+                    return
+                if n is None :
+                    return
                 if not n :
                     self._close(XClosedReason.ClosedByPeer)
                     return
-                self._sizeToRecv -= n
-                if not self._sizeToRecv :
-                    data = self._rdBufView
-                    self._rdBufView = None
-                    self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
-                    self._removeExpireTimeout()
-                    if self._onDataRecv :
-                        try :
-                            self._onDataRecv(self, data, self._onDataRecvArg)
-                        except Exception as ex :
-                            raise XAsyncTCPClientException('Error when handling the "OnDataRecv" event : %s' % ex)
-                    if not self.IsSSL or self._socket.pending() == 0 :
-                        return
+                self._rdBufEnd += n
+                # Without SSL, a partially filled buffer means that the socket
+                # has been drained and it is useless to try to read it again,
+                canRecv = ( self.IsSSL or self._rdBufEnd == self._recvSlotSize )
+        finally :
+            # The handler state and the closing are checked together, so that
+            # the pooled buffer is released only once,
+            poolBuf = None
+            with self._wrLock :
+                self._inRecvHandler = False
+                if self._closed :
+                    poolBuf, self._rdPoolBuf = self._rdPoolBuf, None
+            if poolBuf is not None :
+                self._bufPools.Put(poolBuf)
             else :
-                self._close(XClosedReason.ClosedByHost)
-                return True
+                self._releaseIdleRecvBufSlot()
 
     # ------------------------------------------------------------------------
 
     def OnReadyForWriting(self) :
+        if self._sslHandshaking :
+            self._continueSSLHandshake()
+            return
         if not self._socketOpened :
             if hasattr(self._socket, "getsockopt") :
                 if self._socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) :
@@ -717,9 +2324,21 @@ class XAsyncTCPClient(XAsyncSocket) :
                 except Exception as ex :
                     raise XAsyncTCPClientException('Error when handling the "OnConnected" event : %s' % ex)
             return
-        if self._wrBufView :
+        if self._wrQueue :
+            if self._wrQueue[0][4] :
+                return self._sendFileOnReadyForWriting()
             try :
-                n = self._socket.send(self._wrBufView)
+                if len(self._wrQueue) > 1 and self._canSendMsg() :
+                    # Pending buffers are sent at once with vectored I/O,
+                    with self._wrLock :
+                        bufs = [ ]
+                        for item in self._wrQueue :
+                            if item[4] or len(bufs) == XAsyncTCPClient._SENDMSG_MAX_BUFFERS :
+                                break
+                            bufs.append(item[0])
+                    n = self._socket.sendmsg(bufs)
+                else :
+                    n = self._socket.send(self._wrQueue[0][0])
             except Exception as ex :
                 if hasattr(ssl, 'SSLEOFError') and isinstance(ex, ssl.SSLEOFError) :
                     self._close()
@@ -727,17 +2346,118 @@ class XAsyncTCPClient(XAsyncSocket) :
                 else :
                     self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
                     return
-            self._wrBufView = self._wrBufView[n:]
-            if self._wrBufView :
+            sentItems = [ ]
+            with self._wrLock :
+                self._wrQueueLen -= n
+                while n :
+                    item = self._wrQueue[0]
+                    size = len(item[0])
+                    if n < size :
+                        item[0] = item[0][n:]
+                        break
+                    n -= size
+                    self._wrQueue.popleft()
+                    sentItems.append(item)
+                for item in sentItems :
+                    if item[1] :
+                        self._wrCallbacksCount -= 1
+                    if item[3] :
+                        self._wrSendingBufUsed = False
+                    if item[5] is not None :
+                        self._bufPools.Put(item[5])
+                        item[5] = None
+                if self._wrQueueFull and self._wrQueueLen <= self._wrLowWatermark :
+                    self._wrQueueFull = False
+                pending = (len(self._wrQueue) > 0)
+            if pending :
                 self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
-            elif self._onDataSent :
+            self._triggerDataSent(sentItems)
+
+    # ------------------------------------------------------------------------
+
+    def _triggerDataSent(self, sentItems) :
+        # Each "OnDataSent" event is triggered in order, as soon as its
+        # own buffer is fully sent,
+        for item in sentItems :
+            if item[1] :
                 try :
-                    self._onDataSent(self, self._onDataSentArg)
+                    item[1](self, item[2])
                 except Exception as ex :
                     raise XAsyncTCPClientException('Error when handling the "OnDataSent" event : %s' % ex)
 
     # ------------------------------------------------------------------------
 
+    def _sendFileOnReadyForWriting(self) :
+        # The file is sent by the kernel directly from the page cache, with
+        # os.sendfile, without any copy in user space,
+        item     = self._wrQueue[0]
+        fileInfo = item[4]
+        try :
+            n = sendfile(self._socket.fileno(), fileInfo[0], fileInfo[1], fileInfo[2])
+        except Exception as ex :
+            if isinstance(ex, OSError) and ex.args and ex.args[0] in _WOULD_BLOCK_ERRNOS :
+                self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+                return
+            self._close()
+            return True
+        if not n :
+            self._close()
+            return True
+        fileInfo[1] += n
+        fileInfo[2] -= n
+        if fileInfo[2] > 0 :
+            self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+            return
+        with self._wrLock :
+            self._wrQueue.popleft()
+            if item[1] :
+                self._wrCallbacksCount -= 1
+            pending = (len(self._wrQueue) > 0)
+        if fileInfo[3] :
+            self._setTCPCork(False)
+        if pending :
+            self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+        self._triggerDataSent([item])
+
+    # ------------------------------------------------------------------------
+
+    def _setTCPCork(self, value) :
+        if _TCP_CORK is None :
+            return False
+        try :
+            self._socket.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 1 if value else 0)
+            return True
+        except :
+            return False
+
+    # ------------------------------------------------------------------------
+
+    def _canSendMsg(self) :
+        return hasattr(self._socket, 'sendmsg') and not self.IsSSL
+
+    # ------------------------------------------------------------------------
+
+    def _queueDataToSend(self, view, onDataSent, onDataSentArg, isSendingBuf=False, pooledBuf=None) :
+        with self._wrLock :
+            self._wrQueue.append([view, onDataSent, onDataSentArg, isSendingBuf, None, pooledBuf])
+            self._wrQueueLen += len(view)
+            if onDataSent :
+                self._wrCallbacksCount += 1
+            if self._wrQueueLen >= self._wrHighWatermark :
+                self._wrQueueFull = True
+        self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+
+    # ------------------------------------------------------------------------
+
+    def _notifyNextReadyForReading(self) :
+        self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+        if self._rdBufEnd > self._rdBufStart and not self._inRecvHandler :
+            # Data already received must be processed without waiting for
+            # the socket to be readable again,
+            self._asyncSocketsPool.NotifyReadyForReadingNow(self)
+
+    # ------------------------------------------------------------------------
+
     def AsyncRecvLine(self, lineEncoding='UTF-8', onLineRecv=None, onLineRecvArg=None, timeoutSec=None) :
         if self._rdLinePos is not None or self._sizeToRecv :
             raise XAsyncTCPClientException('AsyncRecvLine : Already waiting asynchronous receive.')
@@ -747,32 +2467,45 @@ class XAsyncTCPClient(XAsyncSocket) :
             self._rdLineEncoding = lineEncoding
             self._onDataRecv     = onLineRecv
             self._onDataRecvArg  = onLineRecvArg
-            self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+            self._notifyNextReadyForReading()
             return True
         return False
 
     # ------------------------------------------------------------------------
 
+    def AsyncWatchClosed(self, watch=True) :
+        # While no data is awaited, the socket is still read ahead so that its
+        # closing by the peer is detected and triggers the "OnClosed" event,
+        self._watchClosed = watch
+        if self._socket and self._rdLinePos is None and not self._sizeToRecv :
+            self._asyncSocketsPool.NotifyNextReadyForReading(self, watch)
+
+    # ------------------------------------------------------------------------
+
     def AsyncRecvData(self, size=None, onDataRecv=None, onDataRecvArg=None, timeoutSec=None) :
         if self._rdLinePos is not None or self._sizeToRecv :
             raise XAsyncTCPClientException('AsyncRecvData : Already waiting asynchronous receive.')
         if self._socket :
             if size is None :
-                size = self._recvBufSlot.Size
+                size = self._recvSlotSize
             elif not isinstance(size, int) or size <= 0 :
                 raise XAsyncTCPClientException('AsyncRecvData : "size" is incorrect.')
-            if size <= self._recvBufSlot.Size :
-                self._rdBufView = memoryview(self._recvBufSlot.Buffer)[:size]
+            if size <= self._recvSlotSize :
+                self._rdBufView = None
             else :
                 try :
-                    self._rdBufView = memoryview(bytearray(size))
+                    if self._bufPools is not None :
+                        self._rdPoolBuf = self._bufPools.Get(size)
+                        self._rdBufView = memoryview(self._rdPoolBuf)[:size]
+                    else :
+                        self._rdBufView = memoryview(bytearray(size))
                 except :
                     raise XAsyncTCPClientException('AsyncRecvData : No enought memory to receive %s bytes.' % size)
             self._setExpireTimeout(timeoutSec)
             self._sizeToRecv    = size
             self._onDataRecv    = onDataRecv
             self._onDataRecvArg = onDataRecvArg
-            self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+            self._notifyNextReadyForReading()
             return True
         return False
 
@@ -782,13 +2515,7 @@ class XAsyncTCPClient(XAsyncSocket) :
         if self._socket :
             try :
                 if bytes([data[0]]) :
-                    if self._wrBufView :
-                        self._wrBufView = memoryview(bytes(self._wrBufView) + data)
-                    else :
-                        self._wrBufView = memoryview(data)
-                    self._onDataSent    = onDataSent
-                    self._onDataSentArg = onDataSentArg
-                    self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+                    self._queueDataToSend(memoryview(data), onDataSent, onDataSentArg)
                     return True
             except :
                 pass
@@ -797,22 +2524,95 @@ class XAsyncTCPClient(XAsyncSocket) :
 
     # ------------------------------------------------------------------------
 
+    def AsyncSendFile(self, file, size, offset=0, onDataSent=None, onDataSentArg=None, prefixData=None) :
+        if not self.CanSendFile :
+            raise XAsyncTCPClientException('AsyncSendFile : Sending files is not supported on this connection.')
+        if not isinstance(size, int) or size <= 0 :
+            raise XAsyncTCPClientException('AsyncSendFile : "size" is incorrect.')
+        if not isinstance(offset, int) or offset < 0 :
+            raise XAsyncTCPClientException('AsyncSendFile : "offset" is incorrect.')
+        try :
+            fd = file.fileno()
+        except :
+            raise XAsyncTCPClientException('AsyncSendFile : "file" is incorrect.')
+        if self._socket :
+            with self._wrLock :
+                # With prefix data (as headers), the socket is corked until the
+                # end of the file so that data are not sent in a small packet,
+                cork = (prefixData is not None and self._setTCPCork(True))
+                if prefixData is not None :
+                    view = memoryview(prefixData)
+                    self._wrQueue.append([view, None, None, False, None, None])
+                    self._wrQueueLen += len(view)
+                self._wrQueue.append([None, onDataSent, onDataSentArg, False, [fd, offset, size, cork], None])
+                if onDataSent :
+                    self._wrCallbacksCount += 1
+            self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+            return True
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def AsyncSendPooledBuffer(self, buf, size=None, onDataSent=None, onDataSentArg=None) :
+        if self._bufPools is None :
+            raise XAsyncTCPClientException('AsyncSendPooledBuffer : No buffer pools are used.')
+        if size is None :
+            size = len(buf)
+        elif not isinstance(size, int) or size <= 0 or size > len(buf) :
+            raise XAsyncTCPClientException('AsyncSendPooledBuffer : "size" is incorrect.')
+        if self._socket :
+            # The buffer goes back to the pools once sent or closed,
+            self._queueDataToSend(memoryview(buf)[:size], onDataSent, onDataSentArg, pooledBuf=buf)
+            return True
+        self._bufPools.Put(buf)
+        return False
+
+    # ------------------------------------------------------------------------
+
     def AsyncSendSendingBuffer(self, size=None, onDataSent=None, onDataSentArg=None) :
-        if self._wrBufView :
+        if self._wrSendingBufUsed :
             raise XAsyncTCPClientException('AsyncSendBufferSlot : Already waiting to send data.')
-        if self._socket :
+        slot = self._getSendBufSlot() if self._socket else None
+        if slot :
             if size is None :
-                size = self._sendBufSlot.Size
-            if size > 0 and size <= self._sendBufSlot.Size :
-                self._wrBufView     = memoryview(self._sendBufSlot.Buffer)[:size]
-                self._onDataSent    = onDataSent
-                self._onDataSentArg = onDataSentArg
-                self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+                size = slot.Size
+            if size > 0 and size <= slot.Size :
+                self._wrSendingBufUsed = True
+                view = memoryview(slot.Buffer)[:size]
+                self._queueDataToSend(view, onDataSent, onDataSentArg, isSendingBuf=True)
                 return True
         return False
 
     # ------------------------------------------------------------------------
 
+    def AcquireSendingBuffer(self) :
+        # The sending buffer is kept by the client as long as one of its
+        # holders has not released it,
+        slot = self._getSendBufSlot() if self._socket else None
+        if slot is None :
+            return None
+        with self._stateLock :
+            self._sendBufRefs += 1
+        return slot.Buffer
+
+    # ------------------------------------------------------------------------
+
+    def ReleaseSendingBuffer(self) :
+        # The sending buffer taken from the slots of the server is given back
+        # once no holder and no pending send use it anymore,
+        with self._stateLock :
+            if self._sendBufRefs > 0 :
+                self._sendBufRefs -= 1
+            slot = self._sendBufSlot
+            if slot is None or slot._owner is None or \
+               self._sendBufRefs or self._wrSendingBufUsed :
+                return False
+            self._sendBufSlot = None
+        slot.Available = True
+        return True
+
+    # ------------------------------------------------------------------------
+
     def _doSSLHandshake(self) :
         count = 0
         while count < 10 :
@@ -834,6 +2634,34 @@ class XAsyncTCPClient(XAsyncSocket) :
 
     # ------------------------------------------------------------------------
 
+    def _continueSSLHandshake(self) :
+        # Goes on with the handshake as far as possible without blocking, and
+        # waits for the socket to be ready again when more data is needed,
+        try :
+            self._socket.do_handshake()
+        except ssl.SSLError as sslErr :
+            if sslErr.args[0] == ssl.SSL_ERROR_WANT_READ :
+                self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+                return
+            if sslErr.args[0] == ssl.SSL_ERROR_WANT_WRITE :
+                self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+                return
+            self._close()
+            return
+        except :
+            self._close()
+            return
+        self._sslHandshaking = False
+        self._removeExpireTimeout()
+        self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
+        if self._onSSLStarted :
+            try :
+                self._onSSLStarted(self)
+            except Exception as ex :
+                raise XAsyncTCPClientException('Error when handling the "OnSSLStarted" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
     def StartSSL( self,
                   keyfile     = None,
                   certfile    = None,
@@ -883,6 +2711,32 @@ class XAsyncTCPClient(XAsyncSocket) :
 
     # ------------------------------------------------------------------------
 
+    def AsyncStartSSLContext(self, sslContext, serverSide=False, onSSLStarted=None, timeoutSec=None) :
+        # The handshake is driven by the readiness events of the socket, the
+        # connection is closed if it fails or does not end before the timeout,
+        if not hasattr(ssl, 'SSLContext') :
+            raise XAsyncTCPClientException('AsyncStartSSLContext : This SSL implementation is not supported.')
+        if not isinstance(sslContext, ssl.SSLContext) :
+            raise XAsyncTCPClientException('AsyncStartSSLContext : "sslContext" is incorrect.')
+        if self.IsSSL :
+            raise XAsyncTCPClientException('AsyncStartSSLContext : SSL already started.')
+        try :
+            self._asyncSocketsPool.NotifyNextReadyForWriting(self, False)
+            self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
+            self._asyncSocketsPool.RemoveAsyncSocket(self)
+            self._socket = sslContext.wrap_socket( self._socket,
+                                                   server_side             = serverSide,
+                                                   do_handshake_on_connect = False )
+            self._asyncSocketsPool.AddAsyncSocket(self)
+        except Exception as ex :
+            raise XAsyncTCPClientException('AsyncStartSSLContext : %s' % ex)
+        self._setExpireTimeout(timeoutSec)
+        self._onSSLStarted   = onSSLStarted
+        self._sslHandshaking = True
+        self._continueSSLHandshake()
+
+    # ------------------------------------------------------------------------
+
     @property
     def SrvAddr(self) :
         return self._srvAddr
@@ -897,9 +2751,58 @@ class XAsyncTCPClient(XAsyncSocket) :
                  hasattr(ssl, 'SSLSocket')  and \
                  isinstance(self._socket, ssl.SSLSocket) )
 
+    @property
+    def IsSSLHandshaking(self) :
+        return self._sslHandshaking
+
     @property
     def SendingBuffer(self) :
-        return self._sendBufSlot.Buffer
+        slot = self._getSendBufSlot()
+        return slot.Buffer if slot else None
+
+    @property
+    def BufferPools(self) :
+        return self._bufPools
+
+    @property
+    def CanSendFile(self) :
+        return ( sendfile is not None and \
+                 hasattr(self._socket, 'fileno') and \
+                 not self.IsSSL )
+
+    @property
+    def BufferedRecvLength(self) :
+        return self._rdBufEnd - self._rdBufStart
+
+    @property
+    def PendingSendsCount(self) :
+        return self._wrCallbacksCount
+
+    @property
+    def SendQueueLength(self) :
+        return self._wrQueueLen
+
+    @property
+    def IsSendQueueFull(self) :
+        return self._wrQueueFull
+
+    @property
+    def SendHighWatermark(self) :
+        return self._wrHighWatermark
+    @SendHighWatermark.setter
+    def SendHighWatermark(self, value) :
+        if not isinstance(value, int) or value < self._wrLowWatermark :
+            raise XAsyncTCPClientException('"SendHighWatermark" must be an integer greater or equal to "SendLowWatermark".')
+        self._wrHighWatermark = value
+
+    @property
+    def SendLowWatermark(self) :
+        return self._wrLowWatermark
+    @SendLowWatermark.setter
+    def SendLowWatermark(self, value) :
+        if not isinstance(value, int) or value < 0 or value > self._wrHighWatermark :
+            raise XAsyncTCPClientException('"SendLowWatermark" must be a positive integer lower or equal to "SendHighWatermark".')
+        self._wrLowWatermark = value
 
     @property
     def OnFailsToConnect(self) :
@@ -1050,19 +2953,37 @@ class XAsyncUDPDatagram(XAsyncSocket) :
 
 class XBufferSlot :
 
-    def __init__(self, size, keepAlloc=True) :
+    def __init__(self, size, keepAlloc=True, owner=None, arena=None, offset=0) :
         self._available = True
         self._size      = size
         self._keepAlloc = keepAlloc
-        self._buffer    = bytearray(size) if keepAlloc else None
+        self._owner     = owner
+        self._arena     = arena
+        self._offset    = offset
+        if arena is not None :
+            self._buffer = memoryview(arena)[offset:offset+size]
+        else :
+            self._buffer = bytearray(size) if keepAlloc else None
+
+    def _find(self, sub, start, end) :
+        # Memoryview slices of the arena cannot be searched, so the search
+        # is done directly in the arena,
+        if self._arena is not None :
+            idx = self._arena.find(sub, self._offset + start, self._offset + end)
+            return (idx - self._offset) if idx >= 0 else idx
+        return self.Buffer.find(sub, start, end)
 
     @property
     def Available(self) :
         return self._available
     @Available.setter
     def Available(self, value) :
-        if value and not self._keepAlloc :
-            self._buffer = None
+        if value :
+            if not self._keepAlloc :
+                self._buffer = None
+            if self._owner is not None :
+                self._owner._releaseSlot(self)
+                return
         self._available = value
 
     @property
@@ -1087,32 +3008,213 @@ class XBufferSlots :
         self._slotsSize  = slotsSize
         self._slots      = [ ]
         self._lock       = allocate_lock()
+        # When allocations are kept, all slots share one contiguous arena,
+        self._arena      = bytearray(slotsCount * slotsSize) if keepAlloc else None
         for i in range(slotsCount) :
-            self._slots.append(XBufferSlot(slotsSize, keepAlloc))
+            self._slots.append( XBufferSlot( size      = slotsSize,
+                                             keepAlloc = keepAlloc,
+                                             owner     = self,
+                                             arena     = self._arena,
+                                             offset    = i * slotsSize ) )
+        # Stack of available slots, the first ones are on the top,
+        self._freeSlots  = self._slots[::-1]
+        self._onRelease  = None
+        # Callbacks waiting for an available slot, in their order of arrival,
+        self._waiters    = deque()
+        self._waitsCount = 0
+
+    def GetAvailableSlot(self, onAvailable=None) :
+        # When no slot is available, the "onAvailable" callback is registered
+        # and is called once a slot is released, it must return False if it
+        # doesn't want the slot anymore,
+        with self._lock :
+            if self._freeSlots :
+                slot = self._freeSlots.pop()
+                slot._available = False
+                return slot
+            if onAvailable :
+                self._waiters.append(onAvailable)
+                self._waitsCount += 1
+        return None
 
-    def GetAvailableSlot(self) :
-        ret = None
-        self._lock.acquire()
-        for slot in self._slots :
-            if slot.Available :
-                slot.Available = False
-                ret = slot
-                break
-        self._lock.release()
-        return ret
+    def _releaseSlot(self, slot) :
+        with self._lock :
+            if slot._available :
+                return
+            slot._available = True
+            self._freeSlots.append(slot)
+        while True :
+            with self._lock :
+                if not self._waiters or not self._freeSlots :
+                    break
+                onAvailable = self._waiters.popleft()
+            try :
+                if onAvailable() :
+                    break
+            except :
+                pass
+        if self._onRelease :
+            self._onRelease()
 
     @property
     def SlotsCount(self) :
-        return self.slotsCount
+        return self._slotsCount
 
     @property
     def SlotsSize(self) :
-        return self.slotsSize
+        return self._slotsSize
+
+    @property
+    def AvailableSlotsCount(self) :
+        return len(self._freeSlots)
+
+    @property
+    def WaitingCount(self) :
+        return len(self._waiters)
+
+    @property
+    def WaitsCount(self) :
+        return self._waitsCount
 
     @property
     def Slots(self) :
         return self._slots
 
+# ============================================================================
+# ===( XBufferPool )==========================================================
+# ============================================================================
+
+class XBufferPool :
+
+    def __init__(self, size, maxCount) :
+        self._size      = size
+        self._maxCount  = maxCount
+        self._free      = [ ]
+        self._lock      = allocate_lock()
+        self._inUse     = 0
+        self._hits      = 0
+        self._misses    = 0
+        self._highWater = 0
+
+    def Get(self) :
+        with self._lock :
+            self._inUse += 1
+            if self._inUse > self._highWater :
+                self._highWater = self._inUse
+            if self._free :
+                self._hits += 1
+                return self._free.pop()
+            self._misses += 1
+        try :
+            return bytearray(self._size)
+        except :
+            with self._lock :
+                self._inUse -= 1
+            raise
+
+    def Put(self, buf) :
+        with self._lock :
+            if self._inUse > 0 :
+                self._inUse -= 1
+            if len(self._free) < self._maxCount :
+                self._free.append(buf)
+
+    @property
+    def Size(self) :
+        return self._size
+
+    @property
+    def MaxCount(self) :
+        return self._maxCount
+
+    @property
+    def FreeCount(self) :
+        return len(self._free)
+
+    @property
+    def InUseCount(self) :
+        return self._inUse
+
+    @property
+    def Hits(self) :
+        return self._hits
+
+    @property
+    def Misses(self) :
+        return self._misses
+
+    @property
+    def HighWater(self) :
+        return self._highWater
+
+    @property
+    def Stats(self) :
+        return { 'size'      : self._size,
+                 'maxCount'  : self._maxCount,
+                 'free'      : len(self._free),
+                 'inUse'     : self._inUse,
+                 'hits'      : self._hits,
+                 'misses'    : self._misses,
+                 'highWater' : self._highWater }
+
+# ============================================================================
+# ===( XBufferPools )=========================================================
+# ============================================================================
+
+class XBufferPoolsException(Exception) :
+    pass
+
+class XBufferPools :
+
+    DEFAULT_CLASSES = ( (4*1024, 16), (64*1024, 4), (1024*1024, 1) )
+
+    def __init__(self, classes=None) :
+        if classes is None :
+            classes = XBufferPools.DEFAULT_CLASSES
+        self._pools     = [ ]
+        self._oversized = 0
+        try :
+            for size, maxCount in sorted(classes) :
+                if not isinstance(size, int) or size <= 0 or \
+                   not isinstance(maxCount, int) or maxCount < 0 :
+                    raise Exception()
+                self._pools.append(XBufferPool(size, maxCount))
+        except :
+            raise XBufferPoolsException('"classes" must be a list of (size, maxCount) positive integers.')
+
+    def _getPool(self, size) :
+        for pool in self._pools :
+            if pool.Size >= size :
+                return pool
+        return None
+
+    def Get(self, size) :
+        # Returns a bytearray of at least "size" bytes, from the smallest
+        # size class that fits,
+        pool = self._getPool(size)
+        if pool :
+            return pool.Get()
+        self._oversized += 1
+        return bytearray(size)
+
+    def Put(self, buf) :
+        pool = self._getPool(len(buf))
+        if pool and pool.Size == len(buf) :
+            pool.Put(buf)
+
+    @property
+    def Pools(self) :
+        return self._pools
+
+    @property
+    def OversizedCount(self) :
+        return self._oversized
+
+    @property
+    def Stats(self) :
+        return { 'classes'   : [ pool.Stats for pool in self._pools ],
+                 'oversized' : self._oversized }
+
 # ============================================================================
 # ===( XFiFo )================================================================
 # ============================================================================
@@ -1165,16 +3267,54 @@ class MicroWorkersException(Exception) :
 
 class MicroWorkers :
 
-    def __init__(self, workersCount, workersStackSize=None) :
+    DEFAULT_IDLE_TIMEOUT_SEC     = 30
+    DEFAULT_SOJOURN_INTERVAL_SEC = 0.500
+
+    _GROW_LATENCY_SEC  = 0.010
+    _GROW_INTERVAL_SEC = 0.010
+
+    def __init__( self,
+                  workersCount,
+                  workersStackSize = None,
+                  maxJobs          = None,
+                  affinity         = False,
+                  maxWorkersCount  = None,
+                  idleTimeoutSec   = DEFAULT_IDLE_TIMEOUT_SEC ) :
         self._workersCount = 0
         self._criticalLock = allocate_lock()
-        self._workersLock  = allocate_lock()
-        self._jobsPrcCount = 0
-        self._jobs         = [ ]
+        self._jobs         = deque()
+        self._maxJobs      = maxJobs
+        self._affinity     = affinity
+        self._affinities   = { }
+        self._workers      = [ ]
+        self._idleWorkers  = deque()
+        self._notFullLocks = [ ]
+        self._notFullAsked = False
+        self._onNotFull    = None
+        self._minCount     = workersCount
+        self._maxCount     = maxWorkersCount if maxWorkersCount else workersCount
+        self._idleTimeout  = idleTimeoutSec
+        self._stackSize    = workersStackSize
+        self._avgJobSec    = 0.0
+        self._lastGrowSec  = 0.0
+        self._sjTarget     = None
+        self._sjInterval   = MicroWorkers.DEFAULT_SOJOURN_INTERVAL_SEC
+        self._sjAboveSec   = 0.0
+        self._sjExitSec    = None
+        self._sojournSec   = 0.0
+        self._overloaded   = False
         self._processing   = True
         originalStackSize  = None
         if not isinstance(workersCount, int) or workersCount <= 0 :
             raise MicroWorkersException('"workersCount" must be an integer greater than zero.')
+        if maxJobs is not None and (not isinstance(maxJobs, int) or maxJobs <= 0) :
+            raise MicroWorkersException('"maxJobs" must be an integer greater than zero or None.')
+        if maxWorkersCount is not None and \
+           (not isinstance(maxWorkersCount, int) or maxWorkersCount < workersCount) :
+            raise MicroWorkersException('"maxWorkersCount" must be an integer greater than or equal to "workersCount" or None.')
+        if idleTimeoutSec is not None and \
+           (not isinstance(idleTimeoutSec, (int, float)) or idleTimeoutSec <= 0) :
+            raise MicroWorkersException('"idleTimeoutSec" must be a number greater than zero or None.')
         if workersStackSize is not None :
             if not isinstance(workersStackSize, int) or workersStackSize <= 0 :
                 raise MicroWorkersException('"workersStackSize" must be an integer greater than zero or None.')
@@ -1182,9 +3322,15 @@ class MicroWorkers :
                 originalStackSize = stack_size(workersStackSize)
             except :
                 raise MicroWorkersException('"workersStackSize" of %s cannot be used.' % workersStackSize)
+        elif self.IsElastic :
+            # Workers started later must use the current stack size,
+            try :
+                self._stackSize = stack_size() or None
+            except :
+                pass
         try :
             for _ in range(workersCount) :
-                start_new_thread(self._workerThreadFunc, (None, ))
+                self._startWorker()
             while self._workersCount < workersCount :
                 sleep(0.010)
         except Exception as ex :
@@ -1193,66 +3339,362 @@ class MicroWorkers :
         if originalStackSize is not None :
             stack_size(originalStackSize)
 
-    def _workerThreadFunc(self, arg) :
+    def _startWorker(self) :
+        # A worker is a list of [waitLock, jobs, retired, busy] where "waitLock"
+        # is kept acquired and released to wake up the worker,
+        worker = [allocate_lock(), deque(), False, False]
+        worker[0].acquire()
         with self._criticalLock :
-            self._workersCount += 1
-        while self._processing :
-            jobFunc = None
-            self._workersLock.acquire()
-            if self._processing :
-                try :
-                    jobFunc, jobArg = self._jobs.pop(0)
-                except :
-                    self._workersLock.acquire()
+            self._workers = self._workers + [worker]
+        try :
+            start_new_thread(self._workerThreadFunc, (worker, ))
+        except :
+            with self._criticalLock :
+                self._workers = [ w for w in self._workers if w is not worker ]
+            raise
+
+    def _growWorkers(self) :
+        # Adds a worker when jobs are waiting longer than expected, either
+        # because they are too many or because handlers are slow,
+        count = len(self._workers)
+        if count >= self._maxCount :
+            return
+        queued = len(self._jobs)
+        if queued < count and queued * self._avgJobSec < count * MicroWorkers._GROW_LATENCY_SEC :
+            return
+        nowSec = perf_counter()
+        if nowSec - self._lastGrowSec < MicroWorkers._GROW_INTERVAL_SEC :
+            return
+        self._lastGrowSec = nowSec
+        originalStackSize = None
+        try :
+            if self._stackSize :
+                originalStackSize = stack_size(self._stackSize)
+            self._startWorker()
+        except :
+            pass
+        if originalStackSize is not None :
             try :
-                self._workersLock.release()
+                stack_size(originalStackSize)
             except :
                 pass
-            if jobFunc :
-                with self._criticalLock :
-                    self._jobsPrcCount += 1
+
+    def _retireWorker(self, worker) :
+        with self._criticalLock :
+            if len(self._workers) <= self._minCount :
+                return False
+            try :
+                self._idleWorkers.remove(worker)
+            except ValueError :
+                # The worker has just been woken up,
+                return False
+            self._workers = [ w for w in self._workers if w is not worker ]
+            worker[2] = True
+        self._moveRetiredJobs(worker)
+        return True
+
+    def _moveRetiredJobs(self, worker) :
+        moved = False
+        while True :
+            try :
+                self._jobs.append(worker[1].popleft())
+                moved = True
+            except IndexError :
+                break
+        if moved :
+            self._wakeUpWorker()
+
+    def _waitToBeWokenUp(self, waitLock) :
+        if self._idleTimeout and self._maxCount > self._minCount :
+            try :
+                return waitLock.acquire(1, self._idleTimeout)
+            except TypeError :
+                # Without timeout support on locks,
+                pass
+        waitLock.acquire()
+        return True
+
+    def _workerThreadFunc(self, worker) :
+        waitLock, jobs = worker[0], worker[1]
+        elastic        = self.IsElastic
+        with self._criticalLock :
+            self._workersCount += 1
+        while self._processing :
+            job = None
+            try :
+                job = jobs.popleft()
+            except IndexError :
+                try :
+                    job = self._jobs.popleft()
+                except IndexError :
+                    pass
+            if job :
+                if self._notFullLocks or self._notFullAsked :
+                    self._signalNotFull()
+                # The busy state is kept per worker to avoid a shared counter,
+                worker[3] = True
+                if job[2] :
+                    self._updateSojourn(perf_counter() - job[2])
+                if elastic :
+                    if self._jobs :
+                        self._growWorkers()
+                    startSec = perf_counter()
                 try :
-                    jobFunc(jobArg)
+                    job[0](job[1])
                 except :
                     pass
-                with self._criticalLock :
-                    self._jobsPrcCount -= 1
+                if elastic :
+                    self._avgJobSec += (perf_counter() - startSec - self._avgJobSec) / 8
+                worker[3] = False
+            else :
+                # Registers the worker as idle and waits to be woken up by a
+                # new job, unless a job was added in the meantime,
+                if self._overloaded :
+                    self._overloaded = False
+                self._idleWorkers.append(worker)
+                if jobs or self._jobs or not self._processing :
+                    try :
+                        self._idleWorkers.remove(worker)
+                        continue
+                    except ValueError :
+                        pass
+                # An elastic worker idle for too long is retired,
+                while not self._waitToBeWokenUp(waitLock) :
+                    if self._retireWorker(worker) :
+                        break
+                if worker[2] :
+                    break
         with self._criticalLock :
             self._workersCount -= 1
 
-    def AddJob(self, function, arg=None) :
-        if function :
-            self._jobs.append( (function, arg) )
+    def _updateSojourn(self, sojournSec) :
+        # As with CoDel, the workers are overloaded when the jobs have waited
+        # longer than the target for a whole interval, and are no longer as
+        # soon as a job waits less,
+        target           = self._sjTarget
+        self._sojournSec = sojournSec
+        if target is None :
+            return
+        nowSec = perf_counter()
+        if sojournSec < target :
+            if self._overloaded :
+                self._overloaded = False
+                self._sjExitSec  = nowSec
+            self._sjAboveSec = 0.0
+        elif not self._overloaded :
+            if not self._sjAboveSec :
+                # Shortly after an overload, the interval is not waited again,
+                if self._sjExitSec is not None and \
+                   nowSec - self._sjExitSec < self._sjInterval :
+                    self._overloaded = True
+                else :
+                    self._sjAboveSec = nowSec + self._sjInterval
+            elif nowSec >= self._sjAboveSec :
+                self._overloaded = True
+
+    def _wakeUpWorker(self, worker=None) :
+        try :
+            if worker is None :
+                # The longest idle worker is woken up first,
+                worker = self._idleWorkers.popleft()
+            else :
+                self._idleWorkers.remove(worker)
+        except (IndexError, ValueError) :
+            return False
+        worker[0].release()
+        return True
+
+    def _signalNotFull(self) :
+        with self._criticalLock :
+            if self.IsQueueFull :
+                return
+            for lock in self._notFullLocks :
+                lock.release()
+            self._notFullLocks.clear()
+            notify, self._notFullAsked = self._notFullAsked, False
+        if notify and self._onNotFull :
             try :
-                self._workersLock.release()
+                self._onNotFull(self)
             except :
                 pass
 
+    def _getJobsCount(self) :
+        count = len(self._jobs)
+        for worker in self._workers :
+            count += len(worker[1])
+        return count
+
+    def _getJobsPrcCount(self) :
+        count = 0
+        for worker in self._workers :
+            if worker[3] :
+                count += 1
+        return count
+
+    def AddJob(self, function, arg=None, affinityKey=None) :
+        if function and self._processing :
+            # Jobs are timestamped only to measure their sojourn time,
+            job = (function, arg, perf_counter() if self._sjTarget else 0.0)
+            if self._affinity and affinityKey is not None :
+                # Jobs with the same key are always processed by the same worker,
+                # the key being pinned to it until it retires, whatever the count,
+                worker = self._affinities.get(affinityKey)
+                if worker is None or worker[2] :
+                    workers = self._workers
+                    worker  = workers[hash(affinityKey) % len(workers)]
+                    self._affinities[affinityKey] = worker
+                worker[1].append(job)
+                if worker[2] :
+                    self._moveRetiredJobs(worker)
+                else :
+                    self._wakeUpWorker(worker)
+            else :
+                try :
+                    worker = self._idleWorkers.popleft()
+                except IndexError :
+                    worker = None
+                if worker :
+                    # The job is handed over to an idle worker through its own
+                    # queue, the shared queue is only used when all are busy,
+                    worker[1].append(job)
+                    worker[0].release()
+                else :
+                    self._jobs.append(job)
+                    if self._maxCount > self._minCount :
+                        self._growWorkers()
+            return True
+        return False
+
+    def ReleaseAffinity(self, affinityKey) :
+        self._affinities.pop(affinityKey, None)
+
+    def WaitNotFull(self, timeoutSec=None) :
+        with self._criticalLock :
+            if not self.IsQueueFull :
+                return True
+            lock = allocate_lock()
+            lock.acquire()
+            self._notFullLocks.append(lock)
+        # Jobs may have been taken before the lock was registered,
+        if not self.IsQueueFull :
+            return True
+        if timeoutSec is None :
+            lock.acquire()
+            return True
+        try :
+            return lock.acquire(1, timeoutSec)
+        except :
+            # Without timeout support on locks,
+            endSec = perf_counter() + timeoutSec
+            while not lock.acquire(0) :
+                if perf_counter() >= endSec :
+                    return False
+                sleep(0.001)
+            return True
+
+    def NotifyNotFull(self) :
+        # "OnNotFull" is called once, as soon as the jobs queue is no longer
+        # full, without waiting for it,
+        with self._criticalLock :
+            self._notFullAsked = True
+        if not self.IsQueueFull :
+            self._signalNotFull()
+
     def StopAll(self) :
         self._processing = False
         self._jobs.clear()
-        try :
-            self._workersLock.release()
-        except :
-            pass
+        self._affinities.clear()
+        for worker in self._workers :
+            worker[1].clear()
+        while self._idleWorkers :
+            self._wakeUpWorker()
+        self._signalNotFull()
         while self._workersCount :
             sleep(0.010)
-            
+            while self._idleWorkers :
+                self._wakeUpWorker()
+
     @property
     def Count(self) :
         return self._workersCount
 
+    @property
+    def MinCount(self) :
+        return self._minCount
+
+    @property
+    def MaxCount(self) :
+        return self._maxCount
+
+    @property
+    def IdleCount(self) :
+        return len(self._idleWorkers)
+
+    @property
+    def IsElastic(self) :
+        return (self._maxCount > self._minCount)
+
     @property
     def JobsInQueue(self) :
-        return len(self._jobs)
+        return self._getJobsCount()
 
     @property
     def JobsInProcess(self) :
-        return self._jobsPrcCount
+        return self._getJobsPrcCount()
 
     @property
     def IsWorking(self) :
-        return (len(self._jobs) > 0 or self._jobsPrcCount > 0)
+        return (self._getJobsCount() > 0 or self._getJobsPrcCount() > 0)
+
+    @property
+    def MaxJobs(self) :
+        return self._maxJobs
+
+    @property
+    def IsQueueFull(self) :
+        return (self._maxJobs is not None and self._getJobsCount() >= self._maxJobs)
+
+    @property
+    def Affinity(self) :
+        return self._affinity
+
+    @property
+    def OnNotFull(self) :
+        return self._onNotFull
+    @OnNotFull.setter
+    def OnNotFull(self, value) :
+        self._onNotFull = value
+
+    @property
+    def SojournTargetSec(self) :
+        return self._sjTarget
+
+    @SojournTargetSec.setter
+    def SojournTargetSec(self, value) :
+        if value is not None and \
+           (not isinstance(value, (int, float)) or value <= 0) :
+            raise MicroWorkersException('"SojournTargetSec" must be a number greater than zero or None.')
+        self._sjAboveSec = 0.0
+        self._overloaded = False
+        self._sjTarget   = value
+
+    @property
+    def SojournIntervalSec(self) :
+        return self._sjInterval
+
+    @SojournIntervalSec.setter
+    def SojournIntervalSec(self, value) :
+        if not isinstance(value, (int, float)) or value <= 0 :
+            raise MicroWorkersException('"SojournIntervalSec" must be a number greater than zero.')
+        self._sjInterval = value
+
+    @property
+    def SojournSec(self) :
+        return self._sojournSec
+
+    @property
+    def IsOverloaded(self) :
+        return self._overloaded
 
 # ============================================================================
 # ============================================================================
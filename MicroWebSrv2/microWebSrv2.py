@@ -4,11 +4,24 @@ The MIT License (MIT)
 Copyright © 2019 Jean-Christophe Bos & HC² (www.hc2.fr)
 """
 
-from .             import *
-from .httpRequest  import HttpRequest
-from os            import stat
-from sys           import implementation
-from _thread       import stack_size
+from .                          import *
+from .httpRequest               import HttpRequest
+from .preforkSupervisor         import PreforkSupervisor
+from .subinterpretersSupervisor import SubinterpretersSupervisor
+from os                         import stat
+from sys                        import implementation
+from _thread                    import stack_size, allocate_lock
+import socket
+
+try :
+    from os import cpu_count
+except :
+    cpu_count = None
+
+try :
+    from concurrent.futures import ThreadPoolExecutor
+except :
+    ThreadPoolExecutor = None
 
 # ============================================================================
 # ===( MicroWebSrv2 )=========================================================
@@ -63,6 +76,8 @@ class MicroWebSrv2 :
 
     _STAT_MODE_DIR = 1 << 14
 
+    DEFAULT_SSL_CIPHERS = 'ECDHE+AES128+AESGCM:ECDHE+CHACHA20:ECDHE+AESGCM:!aNULL'
+
     DEBUG        = 0x00
     INFO         = 0x01
     WARNING      = 0x02
@@ -85,9 +100,34 @@ class MicroWebSrv2 :
         self._slotsCount      = None
         self._slotsSize       = None
         self._keepAlloc       = None
+        self._bufPoolsClasses = None
         self._maxContentLen   = None
+        self._maxPipelined    = 8
         self._bindAddr        = ('0.0.0.0', 80)
+        self._reusePort       = False
+        self._sockOptions     = { 'noDelay'          : True,
+                                  'quickAck'         : False,
+                                  'deferAcceptSec'   : None,
+                                  'fastOpenQueueLen' : None,
+                                  'keepAlive'        : None,
+                                  'sendBufSize'      : None,
+                                  'recvBufSize'      : None }
+        self._overloadPolicy  = XOverloadPolicy.Queue
+        self._retryAfterSec   = 1
+        self._pendingMax      = XAsyncTCPServer.DEFAULT_PENDING_MAX
+        self._overloadResp    = None
+        self._qDelayTarget    = None
+        self._qDelayInterval  = MicroWorkers.DEFAULT_SOJOURN_INTERVAL_SEC
         self._sslContext      = None
+        self._sslTimeoutSec   = 5
+        self._sslCiphers      = MicroWebSrv2.DEFAULT_SSL_CIPHERS
+        self._sslCurve        = None
+        self._sslTickets      = 1
+        self._sslKeysRotSec   = None
+        self._sslRotTimer     = None
+        self._sslRotations    = 0
+        self._sslStatsBase    = None
+        self._sslLock         = allocate_lock()
         self._rootPath        = 'www'
         self._timeoutSec      = 2
         self._notFoundURL     = None
@@ -96,6 +136,14 @@ class MicroWebSrv2 :
         self._onLogging       = None
         self._xasSrv          = None
         self._xasPool         = None
+        self._bufPools        = None
+        self._shards          = [ ]
+        self._prefork         = None
+        self._subinterps      = None
+        self._sslFiles        = None
+        self._executor        = None
+        self._ownExecutor     = False
+        self._executorLock    = allocate_lock()
         self.SetNormalConfig()
 
     # ------------------------------------------------------------------------
@@ -173,36 +221,85 @@ class MicroWebSrv2 :
 
     # ------------------------------------------------------------------------
 
-    def StartInPool(self, asyncSocketsPool) :
-        if not isinstance(asyncSocketsPool, XAsyncSocketsPool) :
-            raise ValueError('"asyncSocketsPool" must be a XAsyncSocketsPool class.')
-        if self._xasSrv :
-            raise MicroWebSrv2Exception('Server is already running.')
+    def _createServer(self, asyncSocketsPool, slotsCount, reusePort=False, srvSocket=None) :
+        self._overloadResp = self._getOverloadResponse()
         try :
-            xBufSlots = XBufferSlots( slotsCount = self._slotsCount,
+            xBufSlots = XBufferSlots( slotsCount = slotsCount,
                                       slotsSize  = self._slotsSize,
                                       keepAlloc  = self._keepAlloc )
         except :
             raise MicroWebSrv2Exception('Not enough memory to allocate slots.')
+        if self._bufPoolsClasses :
+            bufPools = XBufferPools(self._bufPoolsClasses)
+        else :
+            bufPools = None
         try :
-            self._xasSrv = XAsyncTCPServer.Create( asyncSocketsPool = asyncSocketsPool,
-                                                   srvAddr          = self._bindAddr,
-                                                   srvBacklog       = self._backlog,
-                                                   bufSlots         = xBufSlots )
+            xasSrv = XAsyncTCPServer.Create( asyncSocketsPool = asyncSocketsPool,
+                                             srvAddr          = self._bindAddr,
+                                             srvBacklog       = self._backlog,
+                                             bufSlots         = xBufSlots,
+                                             bufPools         = bufPools,
+                                             reusePort        = reusePort or self._reusePort,
+                                             srvSocket        = srvSocket,
+                                             sockOptions      = self._sockOptions )
         except :
             raise MicroWebSrv2Exception('Cannot bind server on %s:%s.' % self._bindAddr)
-        self._xasSrv.OnClientAccepted = self._onSrvClientAccepted
-        self._xasSrv.OnClosed         = self._onSrvClosed
+        xasSrv.OnClientAccepted  = self._onSrvClientAccepted
+        xasSrv.OnClosed          = self._onSrvClosed
+        xasSrv.OverloadPolicy    = self._overloadPolicy
+        xasSrv.OverloadResponse  = self._overloadResp
+        xasSrv.PendingAcceptsMax = self._pendingMax
+        # With a queue delay target, connections are shed when accepted
+        # while the workers are overloaded,
+        xasSrv.ShedOnWorkersOverload = (self._qDelayTarget is not None)
+        return xasSrv
+
+    # ------------------------------------------------------------------------
+
+    def _setupWorkers(self, asyncSocketsPool) :
+        # The sojourn time of the jobs is measured by the workers only when
+        # requests can be shed,
+        workers = asyncSocketsPool.Workers
+        if workers :
+            workers.SojournIntervalSec = self._qDelayInterval
+            workers.SojournTargetSec   = self._qDelayTarget
+
+    # ------------------------------------------------------------------------
+
+    def _getOverloadResponse(self) :
+        # Sent as is to the connections refused when the server is overloaded,
+        return ( 'HTTP/1.1 503 Service Unavailable\r\n'
+                 'Retry-After: %s\r\n'
+                 'Content-Length: 0\r\n'
+                 'Connection: close\r\n'
+                 'Server: MicroWebSrv2 by JC`zic\r\n'
+                 '\r\n' % self._retryAfterSec ).encode()
+
+    # ------------------------------------------------------------------------
+
+    def StartInPool(self, asyncSocketsPool) :
+        if not isinstance(asyncSocketsPool, XAsyncSocketsPool) :
+            raise ValueError('"asyncSocketsPool" must be a XAsyncSocketsPool class.')
+        if self._xasSrv or self._prefork or self._subinterps :
+            raise MicroWebSrv2Exception('Server is already running.')
+        self._xasSrv   = self._createServer(asyncSocketsPool, self._slotsCount)
+        self._bufPools = self._xasSrv.BufferPools
+        self._setupWorkers(asyncSocketsPool)
+        self._startSSLKeysRotation(asyncSocketsPool)
         self.Log('Server listening on %s:%s.' % self._bindAddr, MicroWebSrv2.INFO)
 
     # ------------------------------------------------------------------------
 
-    def StartManaged(self, parllProcCount=1, procStackSize=0) :
+    def StartManaged(self, parllProcCount=1, procStackSize=0, maxParllProcCount=None) :
         if not isinstance(parllProcCount, int) or parllProcCount < 0 :
             raise ValueError('"parllProcCount" must be a positive integer or zero.')
+        if maxParllProcCount is not None and \
+           ( not isinstance(maxParllProcCount, int) or \
+             maxParllProcCount < max(1, parllProcCount) ) :
+            raise ValueError('"maxParllProcCount" must be an integer greater than or equal to "parllProcCount" or None.')
         if not isinstance(procStackSize, int) or procStackSize < 0 :
             raise ValueError('"procStackSize" must be a positive integer or zero.')
-        if self._xasSrv :
+        if self._xasSrv or self._prefork or self._subinterps :
             raise MicroWebSrv2Exception('Server is already running.')
         if procStackSize == 0 and implementation.name == 'micropython' :
             procStackSize = 8*1024
@@ -215,7 +312,9 @@ class MicroWebSrv2 :
             self.StartInPool(self._xasPool)
             try :
                 self.Log('Starts the managed pool to wait for I/O events.', MicroWebSrv2.INFO)
-                self._xasPool.AsyncWaitEvents(threadsCount=parllProcCount)
+                self._xasPool.AsyncWaitEvents( threadsCount    = parllProcCount,
+                                               maxThreadsCount = maxParllProcCount )
+                self._setupWorkers(self._xasPool)
             except :
                 raise MicroWebSrv2Exception('Not enough memory to start %s parallel processes.' % parllProcCount)
         except Exception as ex :
@@ -229,7 +328,203 @@ class MicroWebSrv2 :
 
     # ------------------------------------------------------------------------
 
+    def StartSharded(self, loopsCount=None, procStackSize=0) :
+        if loopsCount is None :
+            loopsCount = (cpu_count() if cpu_count else None) or 1
+        if not isinstance(loopsCount, int) or loopsCount <= 0 :
+            raise ValueError('"loopsCount" must be a positive integer or None.')
+        if not isinstance(procStackSize, int) or procStackSize < 0 :
+            raise ValueError('"procStackSize" must be a positive integer or zero.')
+        if self._xasSrv or self._prefork or self._subinterps :
+            raise MicroWebSrv2Exception('Server is already running.')
+        if procStackSize == 0 and implementation.name == 'micropython' :
+            procStackSize = 8*1024
+        try :
+            saveStackSize = stack_size(procStackSize)
+        except Exception as ex :
+            raise ValueError('"procStackSize" of %s is not correct (%s).' % (procStackSize, ex))
+        # Each loop owns its pool, its listening socket and its part of the
+        # buffer slots, connections stay on the loop that accepted them,
+        slotsCount = max(2, -(-self._slotsCount // loopsCount))
+        try :
+            for i in range(loopsCount) :
+                xasPool = XAsyncSocketsPool()
+                xasSrv  = self._createServer(xasPool, slotsCount, reusePort=(loopsCount > 1))
+                self._shards.append((xasPool, xasSrv))
+                if i == 0 :
+                    self._xasPool  = xasPool
+                    self._xasSrv   = xasSrv
+                    self._bufPools = xasSrv.BufferPools
+                    self._startSSLKeysRotation(xasPool)
+            self.Log( 'Server listening on %s:%s.' % self._bindAddr, MicroWebSrv2.INFO)
+            self.Log( 'Starts %s managed pools to wait for I/O events.' % loopsCount,
+                      MicroWebSrv2.INFO )
+            try :
+                for xasPool, xasSrv in self._shards :
+                    xasPool.AsyncWaitEvents(threadsCount=1)
+            except :
+                raise MicroWebSrv2Exception('Not enough memory to start %s loops.' % loopsCount)
+        except Exception as ex :
+            self.Stop()
+            raise ex
+        finally :
+            try :
+                stack_size(saveStackSize)
+            except :
+                pass
+
+    # ------------------------------------------------------------------------
+
+    def StartPreforked(self, processesCount=None, parllProcCount=1) :
+        if processesCount is None :
+            processesCount = (cpu_count() if cpu_count else None) or 1
+        if not isinstance(processesCount, int) or processesCount <= 0 :
+            raise ValueError('"processesCount" must be a positive integer or None.')
+        if not isinstance(parllProcCount, int) or parllProcCount <= 0 :
+            raise ValueError('"parllProcCount" must be a positive integer.')
+        if self._xasSrv or self._prefork or self._subinterps :
+            raise MicroWebSrv2Exception('Server is already running.')
+        try :
+            prefork = PreforkSupervisor(self, processesCount, parllProcCount)
+        except Exception as ex :
+            raise MicroWebSrv2Exception(str(ex))
+        self.Log('Server listening on %s:%s.' % self._bindAddr, MicroWebSrv2.INFO)
+        self.Log('Starts %s preforked processes.' % processesCount, MicroWebSrv2.INFO)
+        self._prefork = prefork
+        try :
+            prefork.Start()
+        except Exception as ex :
+            self._prefork = None
+            raise MicroWebSrv2Exception(str(ex))
+
+    # ------------------------------------------------------------------------
+
+    def _startPreforkedProcess(self, srvSocket, parllProcCount) :
+        # Runs in a forked process, on the inherited listening socket,
+        self._prefork  = None
+        self._xasPool  = XAsyncSocketsPool()
+        self._xasSrv   = self._createServer(self._xasPool, self._slotsCount, srvSocket=srvSocket)
+        self._bufPools = self._xasSrv.BufferPools
+        self._xasPool.AsyncWaitEvents(threadsCount=parllProcCount)
+        self._setupWorkers(self._xasPool)
+        self._startSSLKeysRotation(self._xasPool)
+        return self._xasPool
+
+    # ------------------------------------------------------------------------
+
+    def ReloadPreforked(self) :
+        if not self._prefork :
+            raise MicroWebSrv2Exception('Server is not running in preforked mode.')
+        if self._prefork.Reload() :
+            self.Log('Reloads the preforked processes.', MicroWebSrv2.INFO)
+            return True
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def StartSubinterpreters(self, interpretersCount=None, setupModule=None) :
+        if interpretersCount is None :
+            interpretersCount = (cpu_count() if cpu_count else None) or 1
+        if not isinstance(interpretersCount, int) or interpretersCount <= 0 :
+            raise ValueError('"interpretersCount" must be a positive integer or None.')
+        if self._xasSrv or self._prefork or self._subinterps :
+            raise MicroWebSrv2Exception('Server is already running.')
+        try :
+            subinterps = SubinterpretersSupervisor(self, interpretersCount, setupModule)
+        except Exception as ex :
+            raise MicroWebSrv2Exception(str(ex))
+        self.Log('Starts %s subinterpreters.' % interpretersCount, MicroWebSrv2.INFO)
+        self._subinterps = subinterps
+        try :
+            subinterps.Start()
+        except Exception as ex :
+            self._subinterps = None
+            raise MicroWebSrv2Exception(str(ex))
+        self.Log('Server listening on %s:%s.' % self._bindAddr, MicroWebSrv2.INFO)
+
+    # ------------------------------------------------------------------------
+
+    def _getConfig(self) :
+        return { 'backlog'         : self._backlog,
+                 'slotsCount'      : self._slotsCount,
+                 'slotsSize'       : self._slotsSize,
+                 'keepAlloc'       : self._keepAlloc,
+                 'bufPoolsClasses' : self._bufPoolsClasses,
+                 'maxContentLen'   : self._maxContentLen,
+                 'maxPipelined'    : self._maxPipelined,
+                 'bindAddr'        : self._bindAddr,
+                 'reusePort'       : self._reusePort,
+                 'sockOptions'     : dict(self._sockOptions),
+                 'overloadPolicy'  : self._overloadPolicy,
+                 'retryAfterSec'   : self._retryAfterSec,
+                 'pendingMax'      : self._pendingMax,
+                 'qDelayTarget'    : self._qDelayTarget,
+                 'qDelayInterval'  : self._qDelayInterval,
+                 'sslFiles'        : self._sslFiles,
+                 'sslCiphers'      : self._sslCiphers,
+                 'sslCurve'        : self._sslCurve,
+                 'sslTickets'      : self._sslTickets,
+                 'sslKeysRotSec'   : self._sslKeysRotSec,
+                 'rootPath'        : self._rootPath,
+                 'timeoutSec'      : self._timeoutSec,
+                 'sslTimeoutSec'   : self._sslTimeoutSec,
+                 'notFoundURL'     : self._notFoundURL,
+                 'allowAllOrigins' : self._allowAllOrigins,
+                 'corsAllowAll'    : self._corsAllowAll }
+
+    # ------------------------------------------------------------------------
+
+    def _startInSubinterpreter(self, config) :
+        # Runs in a subinterpreter with the configuration of the main one,
+        # its pool being processed by the thread of the interpreter,
+        for name, value in config.items() :
+            if name != 'sslFiles' :
+                setattr(self, '_' + name, value)
+        if config['sslFiles'] :
+            self._sslFiles   = config['sslFiles']
+            self._sslContext = self._createSSLContext(*self._sslFiles)
+        self._xasPool  = XAsyncSocketsPool()
+        self._xasSrv   = self._createServer(self._xasPool, self._slotsCount, reusePort=True)
+        self._bufPools = self._xasSrv.BufferPools
+        self._startSSLKeysRotation(self._xasPool)
+        return self._xasPool
+
+    # ------------------------------------------------------------------------
+
+    def StartAsyncio(self, loop=None) :
+        if self._xasSrv or self._prefork or self._subinterps :
+            raise MicroWebSrv2Exception('Server is already running.')
+        try :
+            xasPool = XAsyncioSocketsPool(loop)
+        except Exception as ex :
+            raise MicroWebSrv2Exception('Cannot use the asyncio loop (%s).' % ex)
+        self._xasPool = xasPool
+        try :
+            self.StartInPool(self._xasPool)
+            self.Log('Starts the managed pool in the asyncio loop.', MicroWebSrv2.INFO)
+            self._xasPool.AsyncWaitEvents()
+        except Exception as ex :
+            self.Stop()
+            raise ex
+
+    # ------------------------------------------------------------------------
+
     def Stop(self) :
+        if self._subinterps :
+            self.Log('Stops the subinterpreters.', MicroWebSrv2.INFO)
+            self._subinterps.Stop()
+            self._subinterps = None
+        if self._prefork :
+            self.Log('Stops the preforked processes.', MicroWebSrv2.INFO)
+            self._prefork.Stop()
+            self._prefork = None
+        for xasPool, xasSrv in self._shards[1:] :
+            xasSrv.Close()
+            xasPool.StopWaitEvents()
+        self._shards = [ ]
+        if self._sslRotTimer :
+            self._sslRotTimer.Cancel()
+            self._sslRotTimer = None
         if self._xasSrv :
             self._xasSrv.Close()
             self._xasSrv = None
@@ -237,6 +532,11 @@ class MicroWebSrv2 :
             self.Log('Stops the managed pool.', MicroWebSrv2.INFO)
             self._xasPool.StopWaitEvents()
             self._xasPool = None
+        with self._executorLock :
+            if self._ownExecutor :
+                self._executor.shutdown(wait=False)
+                self._executor    = None
+                self._ownExecutor = False
 
     # ------------------------------------------------------------------------
 
@@ -274,26 +574,53 @@ class MicroWebSrv2 :
 
     def _onSrvClientAccepted(self, xAsyncTCPServer, xAsyncTCPClient) :
         if self._sslContext :
+            # The TLS handshake goes on asynchronously and the request is
+            # received once it succeeds,
+            xAsyncTCPClient.OnClosed = self._onSSLCliClosed
             try :
-                xAsyncTCPClient.StartSSLContext( sslContext = self._sslContext,
-                                                 serverSide = True )
+                xAsyncTCPClient.AsyncStartSSLContext( sslContext   = self._sslContext,
+                                                      serverSide   = True,
+                                                      onSSLStarted = self._onSSLCliStarted,
+                                                      timeoutSec   = self._sslTimeoutSec )
             except :
-                self.Log( 'SSL connection failed from %s:%s.'
-                          % xAsyncTCPClient.CliAddr,
-                          MicroWebSrv2.DEBUG )
                 xAsyncTCPClient.Close()
-                return
+            return
+        HttpRequest(self, xAsyncTCPClient)
+
+    # ------------------------------------------------------------------------
+
+    def _onSSLCliStarted(self, xAsyncTCPClient) :
+        xAsyncTCPClient.OnClosed = None
         HttpRequest(self, xAsyncTCPClient)
 
     # ------------------------------------------------------------------------
 
+    def _onSSLCliClosed(self, xAsyncTCPClient, closedReason) :
+        self.Log( 'SSL connection failed from %s:%s.'
+                  % xAsyncTCPClient.CliAddr,
+                  MicroWebSrv2.DEBUG )
+
+    # ------------------------------------------------------------------------
+
     def _onSrvClosed(self, xAsyncTCPServer, closedReason) :
         self.Log('Server %s:%s closed.' % self._bindAddr, MicroWebSrv2.INFO)
 
     # ------------------------------------------------------------------------
 
+    def _getExecutor(self) :
+        # Without a configured executor, a thread pool is created when needed,
+        with self._executorLock :
+            if not self._executor :
+                if not ThreadPoolExecutor :
+                    raise MicroWebSrv2Exception('No executor is set and concurrent.futures is not available.')
+                self._executor    = ThreadPoolExecutor()
+                self._ownExecutor = True
+            return self._executor
+
+    # ------------------------------------------------------------------------
+
     def _validateChangeConf(self, name='Configuration') :
-        if self._xasSrv :
+        if self._xasSrv or self._prefork or self._subinterps :
             raise MicroWebSrv2Exception('%s cannot be changed while the server is running.' % name)
     
     # ------------------------------------------------------------------------
@@ -309,6 +636,17 @@ class MicroWebSrv2 :
         if caFile is not None and not isinstance(caFile, str) :
             raise ValueError('"caFile" must be a string or None.')
         self._validateChangeConf()
+        self._sslContext   = self._createSSLContext(certFile, keyFile, caFile)
+        self._sslFiles     = (certFile, keyFile, caFile)
+        self._sslRotations = 0
+        self._sslStatsBase = None
+        if self._bindAddr[1] == 80 :
+            self._bindAddr = (self._bindAddr[0], 443)
+
+    # ------------------------------------------------------------------------
+
+    def _createSSLContext(self, certFile, keyFile, caFile) :
+        import ssl
         try :
             ctx = ssl.create_default_context( ssl.Purpose.CLIENT_AUTH,
                                               cafile = caFile )
@@ -318,15 +656,81 @@ class MicroWebSrv2 :
             ctx.load_cert_chain(certfile=certFile, keyfile=keyFile)
         except :
             raise ValueError('"certFile" and "keyFile" must indicate the valid certificate and key files.')
-        self._sslContext = ctx
-        if self._bindAddr[1] == 80 :
-            self._bindAddr = (self._bindAddr[0], 443)
+        # The server chooses among the ciphers in its own order of speed,
+        if self._sslCiphers and hasattr(ctx, 'set_ciphers') :
+            try :
+                ctx.set_ciphers(self._sslCiphers)
+                ctx.options |= ssl.OP_CIPHER_SERVER_PREFERENCE
+            except :
+                raise ValueError('"SSLCiphers" must be a valid cipher list.')
+        if self._sslCurve and hasattr(ctx, 'set_ecdh_curve') :
+            try :
+                ctx.set_ecdh_curve(self._sslCurve)
+            except :
+                raise ValueError('"SSLECDHCurve" must be a valid curve name.')
+        # Sessions are resumed through tickets whose keys are generated with
+        # each context, without tickets the sessions are not resumed,
+        if not self._sslTickets :
+            ctx.options |= getattr(ssl, 'OP_NO_TICKET', 0)
+        elif hasattr(ctx, 'num_tickets') :
+            ctx.num_tickets = self._sslTickets
+        return ctx
+
+    # ------------------------------------------------------------------------
+
+    def _updateSSLContext(self) :
+        if self._sslFiles :
+            self._sslContext = self._createSSLContext(*self._sslFiles)
+
+    # ------------------------------------------------------------------------
+
+    def _startSSLKeysRotation(self, asyncSocketsPool) :
+        if self._sslContext and self._sslKeysRotSec :
+            self._sslRotTimer = asyncSocketsPool.CallEvery( self._sslKeysRotSec,
+                                                            self._onSSLKeysRotation )
+
+    # ------------------------------------------------------------------------
+
+    def _onSSLKeysRotation(self, timer, arg) :
+        # The context is renewed periodically to rotate the keys of the
+        # session tickets, out of the accept path which only reads the
+        # reference, the counters of the previous ones being kept,
+        try :
+            sslContext = self._createSSLContext(*self._sslFiles)
+        except Exception as ex :
+            self.Log('SSL context cannot be renewed : %s' % ex, MicroWebSrv2.ERROR)
+            return
+        with self._sslLock :
+            self._sslStatsBase  = self._getSSLSessionCounters()
+            self._sslContext    = sslContext
+            self._sslRotations += 1
+
+    # ------------------------------------------------------------------------
+
+    def _getSSLSessionCounters(self) :
+        counters = dict(self._sslStatsBase or { 'handshakes' : 0,
+                                                'resumed'    : 0,
+                                                'misses'     : 0,
+                                                'timeouts'   : 0,
+                                                'cacheFull'  : 0 })
+        try :
+            stats = self._sslContext.session_stats()
+        except :
+            return counters
+        counters['handshakes'] += stats['accept_good']
+        counters['resumed']    += stats['hits']
+        counters['misses']     += stats['misses']
+        counters['timeouts']   += stats['timeouts']
+        counters['cacheFull']  += stats['cache_full']
+        return counters
 
     # ------------------------------------------------------------------------
 
     def DisableSSL(self) :
         self._validateChangeConf()
-        self._sslContext = None
+        self._sslContext   = None
+        self._sslFiles     = None
+        self._sslStatsBase = None
         if self._bindAddr[1] == 443 :
             self._bindAddr = (self._bindAddr[0], 80)
 
@@ -334,52 +738,76 @@ class MicroWebSrv2 :
 
     def SetEmbeddedConfig(self) :
         self._validateChangeConf()
-        self._backlog       = 8
-        self._slotsCount    = 16
-        self._slotsSize     = 1024
-        self._keepAlloc     = True
-        self._maxContentLen = 16*1024
+        self._backlog         = 8
+        self._slotsCount      = 16
+        self._slotsSize       = 1024
+        self._keepAlloc       = True
+        self._bufPoolsClasses = ( (4*1024, 2), )
+        self._maxContentLen   = 16*1024
 
     # ------------------------------------------------------------------------
 
     def SetLightConfig(self) :
         self._validateChangeConf()
-        self._backlog       = 64
-        self._slotsCount    = 128
-        self._slotsSize     = 1024
-        self._keepAlloc     = True
-        self._maxContentLen = 512*1024
+        self._backlog         = 64
+        self._slotsCount      = 128
+        self._slotsSize       = 1024
+        self._keepAlloc       = True
+        self._bufPoolsClasses = ( (4*1024, 8), (64*1024, 2) )
+        self._maxContentLen   = 512*1024
 
     # ------------------------------------------------------------------------
 
     def SetNormalConfig(self) :
         self._validateChangeConf()
-        self._backlog       = 256
-        self._slotsCount    = 512
-        self._slotsSize     = 4*1024
-        self._keepAlloc     = True
-        self._maxContentLen = 2*1024*1024
+        self._backlog         = 256
+        self._slotsCount      = 512
+        self._slotsSize       = 4*1024
+        self._keepAlloc       = True
+        self._bufPoolsClasses = ( (4*1024, 32), (64*1024, 8), (1024*1024, 2) )
+        self._maxContentLen   = 2*1024*1024
 
     # ------------------------------------------------------------------------
 
     def SetLargeConfig(self) :
         self._validateChangeConf()
-        self._backlog       = 512
-        self._slotsCount    = 2048
-        self._slotsSize     = 16*1024
-        self._keepAlloc     = True
-        self._maxContentLen = 8*1024*1024
+        self._backlog         = 512
+        self._slotsCount      = 2048
+        self._slotsSize       = 16*1024
+        self._keepAlloc       = True
+        self._bufPoolsClasses = ( (4*1024, 128), (64*1024, 32), (1024*1024, 8) )
+        self._maxContentLen   = 8*1024*1024
 
     # ------------------------------------------------------------------------
 
     @property
     def IsRunning(self) :
+        if self._prefork :
+            return self._prefork.IsRunning
+        if self._subinterps :
+            return self._subinterps.IsRunning
         return ( self._xasPool is not None and \
                  self._xasPool.WaitEventsProcessing and \
                  self._xasSrv is not None )
 
     # ------------------------------------------------------------------------
 
+    @property
+    def ParallelProcessesCount(self) :
+        if not self.IsRunning :
+            return 0
+        if self._prefork :
+            return self._prefork.Stats['parallelProcesses']
+        if self._subinterps :
+            return self._subinterps.InterpretersCount
+        count = 0
+        for xasPool in ([ x[0] for x in self._shards ] or [ self._xasPool ]) :
+            workers = xasPool.Workers
+            count  += 1 + (workers.Count if workers else 0)
+        return count
+
+    # ------------------------------------------------------------------------
+
     @property
     def ConnQueueCapacity(self) :
         return self._backlog
@@ -432,6 +860,170 @@ class MicroWebSrv2 :
 
     # ------------------------------------------------------------------------
 
+    @property
+    def BufferPoolsClasses(self) :
+        return self._bufPoolsClasses
+
+    @BufferPoolsClasses.setter
+    def BufferPoolsClasses(self, value) :
+        if value is not None :
+            try :
+                value = tuple( (int(size), int(maxCount)) for size, maxCount in value )
+                if any(size <= 0 or maxCount < 0 for size, maxCount in value) :
+                    raise Exception()
+            except :
+                raise ValueError('"BufferPoolsClasses" must be a list of (size, maxCount) positive integers or None.')
+        self._validateChangeConf('"BufferPoolsClasses"')
+        self._bufPoolsClasses = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def PreforkedStats(self) :
+        return self._prefork.Stats if self._prefork else None
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def AcceptStats(self) :
+        if self._prefork :
+            return self._prefork.Stats['accept']
+        if not self._xasSrv :
+            return None
+        stats   = self._xasSrv.AcceptStats
+        waitSec = stats['queueWaitAvgSec'] * stats['queued']
+        for xasPool, xasSrv in self._shards[1:] :
+            # The statistics of all loops are summed,
+            shardStats = xasSrv.AcceptStats
+            waitSec   += shardStats['queueWaitAvgSec'] * shardStats['queued']
+            for name in stats :
+                if name == 'maxBatch' or name == 'queueWaitMaxSec' :
+                    stats[name] = max(stats[name], shardStats[name])
+                else :
+                    stats[name] += shardStats[name]
+        if stats['queued'] :
+            stats['queueWaitAvgSec'] = waitSec / stats['queued']
+        return stats
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def OverloadPolicy(self) :
+        return self._overloadPolicy
+
+    @OverloadPolicy.setter
+    def OverloadPolicy(self, value) :
+        if value not in ( XOverloadPolicy.Close,
+                          XOverloadPolicy.Respond,
+                          XOverloadPolicy.Queue ) :
+            raise ValueError('"OverloadPolicy" must be a XOverloadPolicy value.')
+        self._validateChangeConf('"OverloadPolicy"')
+        self._overloadPolicy = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def OverloadRetryAfterSec(self) :
+        return self._retryAfterSec
+
+    @OverloadRetryAfterSec.setter
+    def OverloadRetryAfterSec(self, value) :
+        if not isinstance(value, int) or value <= 0 :
+            raise ValueError('"OverloadRetryAfterSec" must be a positive integer.')
+        self._validateChangeConf('"OverloadRetryAfterSec"')
+        self._retryAfterSec = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def PendingAcceptsMax(self) :
+        return self._pendingMax
+
+    @PendingAcceptsMax.setter
+    def PendingAcceptsMax(self, value) :
+        if not isinstance(value, int) or value < 0 :
+            raise ValueError('"PendingAcceptsMax" must be a positive integer or zero.')
+        self._validateChangeConf('"PendingAcceptsMax"')
+        self._pendingMax = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def QueueDelayTargetSec(self) :
+        return self._qDelayTarget
+
+    @QueueDelayTargetSec.setter
+    def QueueDelayTargetSec(self, value) :
+        if value is not None and \
+           (not isinstance(value, (int, float)) or value <= 0) :
+            raise ValueError('"QueueDelayTargetSec" must be a positive number or None.')
+        self._validateChangeConf('"QueueDelayTargetSec"')
+        self._qDelayTarget = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def QueueDelayIntervalSec(self) :
+        return self._qDelayInterval
+
+    @QueueDelayIntervalSec.setter
+    def QueueDelayIntervalSec(self, value) :
+        if not isinstance(value, (int, float)) or value <= 0 :
+            raise ValueError('"QueueDelayIntervalSec" must be a positive number.')
+        self._validateChangeConf('"QueueDelayIntervalSec"')
+        self._qDelayInterval = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def LoadSheddingStats(self) :
+        if not self.IsRunning :
+            return None
+        if self._prefork :
+            return self._prefork.Stats['loadShedding']
+        workers = self._xasPool.Workers if self._xasPool else None
+        return { 'overloaded' : bool(workers and workers.IsOverloaded),
+                 'sojournSec' : (workers.SojournSec if workers else 0.0),
+                 'shed'       : self.AcceptStats['shed'] }
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def BufferPoolsStats(self) :
+        if self._prefork :
+            return self._prefork.Stats['bufferPools']
+        if not self._bufPools :
+            return None
+        stats = self._bufPools.Stats
+        for xasPool, xasSrv in self._shards[1:] :
+            # The statistics of all loops are summed,
+            shardStats          = xasSrv.BufferPools.Stats
+            stats['oversized'] += shardStats['oversized']
+            for clsStats, shardClsStats in zip(stats['classes'], shardStats['classes']) :
+                for name in clsStats :
+                    if name != 'size' :
+                        clsStats[name] += shardClsStats[name]
+        return stats
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def Executor(self) :
+        return self._executor
+
+    @Executor.setter
+    def Executor(self, value) :
+        if value is not None and not hasattr(value, 'submit') :
+            raise ValueError('"Executor" must be a concurrent.futures executor or None.')
+        self._validateChangeConf('"Executor"')
+        with self._executorLock :
+            if self._ownExecutor :
+                self._executor.shutdown(wait=False)
+            self._executor    = value
+            self._ownExecutor = False
+
+    # ------------------------------------------------------------------------
+
     @property
     def MaxRequestContentLength(self) :
         return self._maxContentLen
@@ -444,6 +1036,18 @@ class MicroWebSrv2 :
 
     # ------------------------------------------------------------------------
 
+    @property
+    def MaxPipelinedRequests(self) :
+        return self._maxPipelined
+
+    @MaxPipelinedRequests.setter
+    def MaxPipelinedRequests(self, value) :
+        if not isinstance(value, int) or value < 0 :
+            raise ValueError('"MaxPipelinedRequests" must be a positive integer or zero.')
+        self._maxPipelined = value
+
+    # ------------------------------------------------------------------------
+
     @property
     def BindAddress(self) :
         return self._bindAddr
@@ -461,12 +1065,192 @@ class MicroWebSrv2 :
 
     # ------------------------------------------------------------------------
 
+    @property
+    def ReusePort(self) :
+        return self._reusePort
+
+    @ReusePort.setter
+    def ReusePort(self, value) :
+        if not isinstance(value, bool) :
+            raise ValueError('"ReusePort" must be a boolean.')
+        if value and not hasattr(socket, 'SO_REUSEPORT') :
+            raise MicroWebSrv2Exception('SO_REUSEPORT is not supported on this platform.')
+        self._validateChangeConf('"ReusePort"')
+        self._reusePort = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def TCPNoDelay(self) :
+        return self._sockOptions['noDelay']
+
+    @TCPNoDelay.setter
+    def TCPNoDelay(self, value) :
+        if not isinstance(value, bool) :
+            raise ValueError('"TCPNoDelay" must be a boolean.')
+        self._validateChangeConf('"TCPNoDelay"')
+        self._sockOptions['noDelay'] = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def TCPQuickAck(self) :
+        return self._sockOptions['quickAck']
+
+    @TCPQuickAck.setter
+    def TCPQuickAck(self, value) :
+        if not isinstance(value, bool) :
+            raise ValueError('"TCPQuickAck" must be a boolean.')
+        self._validateChangeConf('"TCPQuickAck"')
+        self._sockOptions['quickAck'] = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def TCPDeferAcceptSec(self) :
+        return self._sockOptions['deferAcceptSec']
+
+    @TCPDeferAcceptSec.setter
+    def TCPDeferAcceptSec(self, value) :
+        if value is not None and (not isinstance(value, int) or value <= 0) :
+            raise ValueError('"TCPDeferAcceptSec" must be a positive integer or None.')
+        self._validateChangeConf('"TCPDeferAcceptSec"')
+        self._sockOptions['deferAcceptSec'] = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def TCPFastOpenQueueLen(self) :
+        return self._sockOptions['fastOpenQueueLen']
+
+    @TCPFastOpenQueueLen.setter
+    def TCPFastOpenQueueLen(self, value) :
+        if value is not None and (not isinstance(value, int) or value <= 0) :
+            raise ValueError('"TCPFastOpenQueueLen" must be a positive integer or None.')
+        self._validateChangeConf('"TCPFastOpenQueueLen"')
+        self._sockOptions['fastOpenQueueLen'] = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def TCPKeepAlive(self) :
+        return self._sockOptions['keepAlive']
+
+    @TCPKeepAlive.setter
+    def TCPKeepAlive(self, value) :
+        if value is not None :
+            try :
+                value = tuple(int(x) for x in value)
+                if len(value) != 3 or min(value) <= 0 :
+                    raise Exception()
+            except :
+                raise ValueError('"TCPKeepAlive" must be a tuple of (idleSec, intervalSec, count) positive integers or None.')
+        self._validateChangeConf('"TCPKeepAlive"')
+        self._sockOptions['keepAlive'] = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SocketSendBufferSize(self) :
+        return self._sockOptions['sendBufSize']
+
+    @SocketSendBufferSize.setter
+    def SocketSendBufferSize(self, value) :
+        if value is not None and (not isinstance(value, int) or value <= 0) :
+            raise ValueError('"SocketSendBufferSize" must be a positive integer or None.')
+        self._validateChangeConf('"SocketSendBufferSize"')
+        self._sockOptions['sendBufSize'] = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SocketRecvBufferSize(self) :
+        return self._sockOptions['recvBufSize']
+
+    @SocketRecvBufferSize.setter
+    def SocketRecvBufferSize(self, value) :
+        if value is not None and (not isinstance(value, int) or value <= 0) :
+            raise ValueError('"SocketRecvBufferSize" must be a positive integer or None.')
+        self._validateChangeConf('"SocketRecvBufferSize"')
+        self._sockOptions['recvBufSize'] = value
+
+    # ------------------------------------------------------------------------
+
     @property
     def IsSSLEnabled(self) :
         return (self._sslContext is not None)
 
     # ------------------------------------------------------------------------
 
+    @property
+    def SSLCiphers(self) :
+        return self._sslCiphers
+
+    @SSLCiphers.setter
+    def SSLCiphers(self, value) :
+        if value is not None and (not isinstance(value, str) or len(value) == 0) :
+            raise ValueError('"SSLCiphers" must be a not empty string or None.')
+        self._validateChangeConf('"SSLCiphers"')
+        self._sslCiphers = value
+        self._updateSSLContext()
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SSLECDHCurve(self) :
+        return self._sslCurve
+
+    @SSLECDHCurve.setter
+    def SSLECDHCurve(self, value) :
+        if value is not None and (not isinstance(value, str) or len(value) == 0) :
+            raise ValueError('"SSLECDHCurve" must be a not empty string or None.')
+        self._validateChangeConf('"SSLECDHCurve"')
+        self._sslCurve = value
+        self._updateSSLContext()
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SSLSessionTicketsCount(self) :
+        return self._sslTickets
+
+    @SSLSessionTicketsCount.setter
+    def SSLSessionTicketsCount(self, value) :
+        if not isinstance(value, int) or value < 0 :
+            raise ValueError('"SSLSessionTicketsCount" must be a positive integer or zero.')
+        self._validateChangeConf('"SSLSessionTicketsCount"')
+        self._sslTickets = value
+        self._updateSSLContext()
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SSLTicketKeysRotationSec(self) :
+        return self._sslKeysRotSec
+
+    @SSLTicketKeysRotationSec.setter
+    def SSLTicketKeysRotationSec(self, value) :
+        if value is not None and (not isinstance(value, int) or value <= 0) :
+            raise ValueError('"SSLTicketKeysRotationSec" must be a positive integer or None.')
+        self._validateChangeConf('"SSLTicketKeysRotationSec"')
+        self._sslKeysRotSec = value
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SSLSessionStats(self) :
+        if self._prefork :
+            return self._prefork.Stats['ssl']
+        if not self._sslContext :
+            return None
+        stats = self._getSSLSessionCounters()
+        stats['hitRate']   = ( stats['resumed'] / stats['handshakes']
+                               if stats['handshakes'] else 0.0 )
+        stats['rotations'] = self._sslRotations
+        return stats
+
+    # ------------------------------------------------------------------------
+
     @property
     def RootPath(self) :
         return self._rootPath
@@ -492,6 +1276,18 @@ class MicroWebSrv2 :
 
     # ------------------------------------------------------------------------
 
+    @property
+    def SSLHandshakeTimeoutSec(self) :
+        return self._sslTimeoutSec
+
+    @SSLHandshakeTimeoutSec.setter
+    def SSLHandshakeTimeoutSec(self, value) :
+        if not isinstance(value, (int, float)) or value <= 0 :
+            raise ValueError('"SSLHandshakeTimeoutSec" must be a positive number.')
+        self._sslTimeoutSec = value
+
+    # ------------------------------------------------------------------------
+
     @property
     def NotFoundURL(self) :
         return self._notFoundURL
@@ -197,8 +197,16 @@ class WebSocket :
                             # Frame is too large for memory allocation,
                             self._close(1009, 'Frame is too large to be processed')
                             return
-                    else :
+                    elif fin :
                         self._currentMsgData = data
+                    else :
+                        # Received data is only valid in this handler,
+                        try :
+                            self._currentMsgData = bytearray(data)
+                        except :
+                            # Frame is too large for memory allocation,
+                            self._close(1009, 'Frame is too large to be processed')
+                            return
 
                     if fin :
                         # Frame is fully received,
@@ -345,10 +353,18 @@ class WebSocket :
             if opcode >= 0x00 and opcode <= 0x0F :
                 length = len(data) if data else 0
                 if length <= 0xFFFF :
-                    data = bytes([ (opcode | 0x80) if fin else opcode ] )  \
-                         + bytes([ length if length <= 0x7D else 0x7E ] )  \
-                         + (pack('>H', length) if length >= 0x7E else b'') \
-                         + (bytes(data) if data else b'')
+                    hdr = bytes([ (opcode | 0x80) if fin else opcode ] )  \
+                        + bytes([ length if length <= 0x7D else 0x7E ] )  \
+                        + (pack('>H', length) if length >= 0x7E else b'')
+                    bufPools = self._xasCli.BufferPools
+                    if bufPools and length :
+                        # The frame is built in a buffer borrowed from the pools,
+                        size = len(hdr) + length
+                        buf  = bufPools.Get(size)
+                        buf[:len(hdr)]     = hdr
+                        buf[len(hdr):size] = data
+                        return self._xasCli.AsyncSendPooledBuffer(buf, size)
+                    data = hdr + (bytes(data) if data else b'')
                     return self._xasCli.AsyncSendData(data)
         except :
             pass
@@ -0,0 +1,387 @@
+"""
+The MIT License (MIT)
+Copyright © 2019 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+from   _thread  import allocate_lock, start_new_thread
+from   time     import perf_counter, sleep
+import socket
+import select
+import json
+import os
+
+try :
+    import signal
+except :
+    signal = None
+
+# ============================================================================
+# ===( PreforkSupervisor )====================================================
+# ============================================================================
+
+class PreforkSupervisorException(Exception) :
+    pass
+
+# ----------------------------------------------------------------------------
+
+class PreforkSupervisor :
+
+    STATS_INTERVAL_SEC = 1
+    READY_TIMEOUT_SEC  = 10
+    RESTART_DELAY_SEC  = 1
+    DRAIN_TIMEOUT_SEC  = 30
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, microWebSrv2, processesCount, parllProcCount) :
+        if not hasattr(os, 'fork') or not signal :
+            raise PreforkSupervisorException('Forking processes is not supported on this platform.')
+        self._mws2           = microWebSrv2
+        self._procsCount     = processesCount
+        self._parllProcCount = parllProcCount
+        self._lock           = allocate_lock()
+        self._procs          = { }
+        self._retiring       = set()
+        self._restartTimes   = [ ]
+        self._restarts       = 0
+        self._reloads        = 0
+        self._reloading      = False
+        self._running        = False
+        try :
+            self._srvSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._srvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._srvSocket.bind(microWebSrv2._bindAddr)
+            self._srvSocket.listen(microWebSrv2._backlog)
+        except :
+            self._srvSocket.close()
+            raise PreforkSupervisorException('Cannot bind server on %s:%s.' % microWebSrv2._bindAddr)
+
+    # ------------------------------------------------------------------------
+
+    def _spawn(self) :
+        # The listening socket is inherited by the forked process that
+        # accepts on it and reports its statistics through a pipe,
+        rdFd, wrFd = os.pipe()
+        with self._lock :
+            pid = os.fork()
+            if pid == 0 :
+                os.close(rdFd)
+                for proc in self._procs.values() :
+                    try :
+                        os.close(proc['fd'])
+                    except :
+                        pass
+                self._runProcess(wrFd)
+            os.close(wrFd)
+            self._procs[pid] = { 'fd'       : rdFd,
+                                 'buf'      : b'',
+                                 'started'  : perf_counter(),
+                                 'stats'    : None }
+        return pid
+
+    # ------------------------------------------------------------------------
+
+    def _onTerminate(self, signum, frame) :
+        self._terminating = True
+
+    # ------------------------------------------------------------------------
+
+    def _runProcess(self, wrFd) :
+        # Runs in the forked process until it is terminated by the supervisor,
+        # it then stops accepting and lets the current connections end,
+        exitCode = 0
+        try :
+            self._terminating = False
+            signal.signal(signal.SIGTERM, self._onTerminate)
+            signal.signal(signal.SIGINT,  signal.SIG_IGN)
+            xasPool = self._mws2._startPreforkedProcess(self._srvSocket, self._parllProcCount)
+            while not self._terminating and xasPool.WaitEventsProcessing :
+                stats = { 'connections'       : max(0, xasPool.AsyncSocketsCount - 1),
+                          'parallelProcesses' : self._mws2.ParallelProcessesCount,
+                          'accept'            : self._mws2.AcceptStats,
+                          'loadShedding'      : self._mws2.LoadSheddingStats,
+                          'ssl'               : self._mws2.SSLSessionStats,
+                          'bufferPools'       : self._mws2.BufferPoolsStats }
+                os.write(wrFd, (json.dumps(stats) + '\n').encode())
+                sleep(PreforkSupervisor.STATS_INTERVAL_SEC)
+            self._mws2._xasSrv.Close()
+            timeoutSec = perf_counter() + PreforkSupervisor.DRAIN_TIMEOUT_SEC
+            while xasPool.AsyncSocketsCount and perf_counter() < timeoutSec :
+                sleep(0.1)
+        except :
+            exitCode = 1
+        finally :
+            try :
+                self._mws2.Stop()
+            except :
+                pass
+            os._exit(exitCode)
+
+    # ------------------------------------------------------------------------
+
+    def _readStats(self, timeoutSec) :
+        with self._lock :
+            fds = { proc['fd'] : pid for pid, proc in self._procs.items() }
+        if not fds :
+            sleep(timeoutSec)
+            return
+        try :
+            rd = select.select(list(fds), [ ], [ ], timeoutSec)[0]
+        except :
+            return
+        for fd in rd :
+            try :
+                data = os.read(fd, 4096)
+            except :
+                data = b''
+            with self._lock :
+                proc = self._procs.get(fds[fd])
+                if proc and data :
+                    lines       = (proc['buf'] + data).split(b'\n')
+                    proc['buf'] = lines.pop()
+                    for line in lines :
+                        try :
+                            proc['stats'] = json.loads(line)
+                        except :
+                            pass
+
+    # ------------------------------------------------------------------------
+
+    def _reapProcesses(self) :
+        ended = [ ]
+        with self._lock :
+            for pid in list(self._procs) :
+                try :
+                    done = os.waitpid(pid, os.WNOHANG)[0]
+                except :
+                    done = pid
+                if done :
+                    try :
+                        os.close(self._procs[pid]['fd'])
+                    except :
+                        pass
+                    started = self._procs[pid]['started']
+                    del self._procs[pid]
+                    if pid in self._retiring :
+                        self._retiring.discard(pid)
+                    else :
+                        ended.append(started)
+        if self._running :
+            for started in ended :
+                # A crashed process is restarted, with a delay if it died
+                # just after being started to avoid a restart storm,
+                self._restartTimes.append(started + PreforkSupervisor.RESTART_DELAY_SEC)
+                self._restarts += 1
+            now = perf_counter()
+            for t in list(self._restartTimes) :
+                if t <= now :
+                    self._restartTimes.remove(t)
+                    self._mws2.Log( 'Restarts a preforked process that has ended.',
+                                    self._mws2.WARNING )
+                    try :
+                        self._spawn()
+                    except :
+                        self._restartTimes.append(now + PreforkSupervisor.RESTART_DELAY_SEC)
+
+    # ------------------------------------------------------------------------
+
+    def _supervise(self) :
+        while self._running :
+            try :
+                self._readStats(0.2)
+                self._reapProcesses()
+            except :
+                sleep(0.2)
+
+    # ------------------------------------------------------------------------
+
+    def _waitProcessReady(self, pid) :
+        timeoutSec = perf_counter() + PreforkSupervisor.READY_TIMEOUT_SEC
+        while self._running and perf_counter() < timeoutSec :
+            with self._lock :
+                proc = self._procs.get(pid)
+                if not proc or proc['stats'] is not None :
+                    return proc is not None
+            sleep(0.05)
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def _waitProcessesEnded(self, pids, timeoutSec) :
+        timeoutSec += perf_counter()
+        while perf_counter() < timeoutSec :
+            with self._lock :
+                if not any(pid in self._procs for pid in pids) :
+                    return True
+            self._reapProcesses()
+            sleep(0.05)
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def _rollingReload(self, pids) :
+        # Processes are replaced one by one, each new process being ready
+        # before the old one stops accepting and drains its connections,
+        try :
+            for pid in pids :
+                if not self._running :
+                    break
+                self._waitProcessReady(self._spawn())
+                with self._lock :
+                    if pid not in self._procs :
+                        continue
+                    self._retiring.add(pid)
+                try :
+                    os.kill(pid, signal.SIGTERM)
+                except :
+                    pass
+                self._waitProcessesEnded([pid], PreforkSupervisor.DRAIN_TIMEOUT_SEC)
+            self._reloads += 1
+        finally :
+            self._reloading = False
+
+    # ------------------------------------------------------------------------
+
+    def Start(self) :
+        self._running = True
+        try :
+            for i in range(self._procsCount) :
+                self._spawn()
+            start_new_thread(self._supervise, ())
+        except :
+            self.Stop()
+            raise PreforkSupervisorException('Cannot start %s preforked processes.' % self._procsCount)
+
+    # ------------------------------------------------------------------------
+
+    def Reload(self) :
+        if not self._running :
+            raise PreforkSupervisorException('Supervisor is not running.')
+        with self._lock :
+            if self._reloading :
+                return False
+            self._reloading = True
+            pids = [ pid for pid in self._procs if pid not in self._retiring ]
+        try :
+            start_new_thread(self._rollingReload, (pids, ))
+        except :
+            self._reloading = False
+            raise PreforkSupervisorException('Cannot start the rolling reload.')
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def Stop(self) :
+        self._running = False
+        with self._lock :
+            pids = list(self._procs)
+            self._retiring.update(pids)
+        for pid in pids :
+            try :
+                os.kill(pid, signal.SIGTERM)
+            except :
+                pass
+        if not self._waitProcessesEnded(pids, PreforkSupervisor.DRAIN_TIMEOUT_SEC + 1) :
+            for pid in pids :
+                try :
+                    os.kill(pid, signal.SIGKILL)
+                except :
+                    pass
+            self._waitProcessesEnded(pids, 1)
+        try :
+            self._srvSocket.close()
+        except :
+            pass
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def IsRunning(self) :
+        return self._running
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def Stats(self) :
+        with self._lock :
+            procs = { pid : proc['stats'] for pid, proc in self._procs.items() }
+        stats = { 'processes'         : len(procs),
+                  'restarts'          : self._restarts,
+                  'reloads'           : self._reloads,
+                  'connections'       : 0,
+                  'parallelProcesses' : 0,
+                  'accept'            : None,
+                  'loadShedding'      : None,
+                  'ssl'               : None,
+                  'bufferPools'       : None,
+                  'byProcess'         : procs }
+        for procStats in procs.values() :
+            if procStats :
+                stats['connections']       += procStats.get('connections', 0)
+                stats['parallelProcesses'] += procStats.get('parallelProcesses', 0)
+        # The statistics of all processes are summed,
+        for name, sumStats in ( ('accept',       PreforkSupervisor._sumAcceptStats),
+                                ('loadShedding', PreforkSupervisor._sumLoadSheddingStats),
+                                ('ssl',          PreforkSupervisor._sumSSLStats),
+                                ('bufferPools',  PreforkSupervisor._sumBufferPoolsStats) ) :
+            statsList = [ procStats[name] for procStats in procs.values()
+                          if procStats and procStats.get(name) ]
+            if statsList :
+                stats[name] = sumStats(statsList)
+        return stats
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _sumAcceptStats(statsList) :
+        stats   = dict(statsList[0])
+        waitSec = stats['queueWaitAvgSec'] * stats['queued']
+        for procStats in statsList[1:] :
+            waitSec += procStats['queueWaitAvgSec'] * procStats['queued']
+            for name in stats :
+                if name == 'maxBatch' or name == 'queueWaitMaxSec' :
+                    stats[name] = max(stats[name], procStats.get(name, 0))
+                else :
+                    stats[name] += procStats.get(name, 0)
+        if stats['queued'] :
+            stats['queueWaitAvgSec'] = waitSec / stats['queued']
+        return stats
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _sumLoadSheddingStats(statsList) :
+        return { 'overloaded' : any(stats['overloaded'] for stats in statsList),
+                 'sojournSec' : max(stats['sojournSec'] for stats in statsList),
+                 'shed'       : sum(stats['shed'] for stats in statsList) }
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _sumSSLStats(statsList) :
+        stats = dict(statsList[0])
+        for procStats in statsList[1:] :
+            for name in stats :
+                if name != 'hitRate' :
+                    stats[name] += procStats.get(name, 0)
+        stats['hitRate'] = ( stats['resumed'] / stats['handshakes']
+                             if stats['handshakes'] else 0.0 )
+        return stats
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _sumBufferPoolsStats(statsList) :
+        stats = { 'classes'   : [ dict(clsStats) for clsStats in statsList[0]['classes'] ],
+                  'oversized' : statsList[0]['oversized'] }
+        for procStats in statsList[1:] :
+            stats['oversized'] += procStats['oversized']
+            for clsStats, procClsStats in zip(stats['classes'], procStats['classes']) :
+                for name in clsStats :
+                    if name != 'size' :
+                        clsStats[name] += procClsStats.get(name, 0)
+        return stats
+
+# ============================================================================
+# ============================================================================
+# ============================================================================
@@ -0,0 +1,252 @@
+"""
+The MIT License (MIT)
+Copyright © 2019 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+from   .webRoute  import _registeredRoutes
+from   _thread    import allocate_lock, start_new_thread
+from   time       import perf_counter, sleep
+import socket
+import select
+import sys
+import os
+
+try :
+    from importlib import import_module
+except :
+    import_module = None
+
+try :
+    import _interpreters as _interps
+except :
+    try :
+        import _xxsubinterpreters as _interps
+    except :
+        _interps = None
+
+# ============================================================================
+# ===( SubinterpretersSupervisor )============================================
+# ============================================================================
+
+class SubinterpretersSupervisorException(Exception) :
+    pass
+
+# ----------------------------------------------------------------------------
+
+class SubinterpretersSupervisor :
+
+    READY_TIMEOUT_SEC = 30
+    STOP_TIMEOUT_SEC  = 30
+    CHECK_STOP_SEC    = 0.25
+
+    _SCRIPT = "import sys\n"                                                    \
+              "sys.path[:] = %(sysPath)r\n"                                     \
+              "from %(package)s.subinterpretersSupervisor import *\n"           \
+              "SubinterpretersSupervisor._runInterpreter(%(setup)r)\n"
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, microWebSrv2, interpretersCount, setupModule=None) :
+        if not _interps :
+            raise SubinterpretersSupervisorException('Subinterpreters are not supported on this platform.')
+        if not hasattr(socket, 'SO_REUSEPORT') :
+            raise SubinterpretersSupervisorException('SO_REUSEPORT is not supported on this platform.')
+        self._mws2         = microWebSrv2
+        self._interpsCount = interpretersCount
+        self._setupModule  = SubinterpretersSupervisor._getSetupModule(setupModule)
+        self._lock         = allocate_lock()
+        self._interpIDs    = [ ]
+        self._endedCount   = 0
+        self._running      = False
+        self._readyRdFd    = None
+        self._readyWrFd    = None
+        self._stopRdFd     = None
+        self._stopWrFd     = None
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _getSetupModule(setupModule) :
+        # The setup is given as a module name or as a function of a module,
+        # both must be importable again in each interpreter,
+        if setupModule is None :
+            return None
+        if isinstance(setupModule, str) :
+            return (setupModule, None)
+        modName  = getattr(setupModule, '__module__', None)
+        funcName = getattr(setupModule, '__qualname__', None)
+        if not modName or not funcName or '<' in funcName :
+            raise SubinterpretersSupervisorException('"setupModule" must be a module name or an importable function.')
+        if modName == '__main__' :
+            raise SubinterpretersSupervisorException( 'Setup function "%s" is defined in "__main__" and cannot be imported '
+                                                      'in subinterpreters, move it to an importable module.' % funcName )
+        return (modName, funcName)
+
+    # ------------------------------------------------------------------------
+
+    def _getSetup(self) :
+        # Routes and modules cannot be shared between interpreters, so only
+        # the setup module and the modules of the route handlers are imported
+        # again in each interpreter, the main script is never run again,
+        modules = [ ]
+        for regRoute in _registeredRoutes :
+            modName = getattr(regRoute.Handler, '__module__', None)
+            if modName == '__main__' :
+                raise SubinterpretersSupervisorException( 'Route handler "%s" is defined in "__main__" and cannot be imported '
+                                                          'in subinterpreters, move it to an importable module.'
+                                                          % regRoute.Handler.__name__ )
+            if modName and modName not in modules :
+                modules.append(modName)
+        return { 'setupModule'   : self._setupModule,
+                 'modules'       : modules,
+                 'loadedModules' : list(self._mws2._modules),
+                 'config'        : self._mws2._getConfig(),
+                 'readyFd'       : self._readyWrFd,
+                 'stopFd'        : self._stopRdFd }
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _onCheckStop(timer, arg) :
+        mws2, stopFd = arg
+        if select.select([stopFd], [ ], [ ], 0)[0] :
+            timer.Cancel()
+            mws2.Stop()
+
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _runInterpreter(setup) :
+        # Runs in a subinterpreter, its thread processing the events of its
+        # own pool until the supervisor closes the stop pipe,
+        from .microWebSrv2 import MicroWebSrv2
+        mws2  = None
+        ready = False
+        try :
+            if setup['setupModule'] :
+                modName, funcName = setup['setupModule']
+                setupFunc = import_module(modName)
+                if funcName :
+                    for name in funcName.split('.') :
+                        setupFunc = getattr(setupFunc, name)
+                    setupFunc()
+            for modName in setup['modules'] :
+                import_module(modName)
+            for modName in setup['loadedModules'] :
+                if modName not in MicroWebSrv2._modules :
+                    MicroWebSrv2.LoadModule(modName)
+            mws2    = MicroWebSrv2()
+            xasPool = mws2._startInSubinterpreter(setup['config'])
+            xasPool.CallEvery( SubinterpretersSupervisor.CHECK_STOP_SEC,
+                               SubinterpretersSupervisor._onCheckStop,
+                               (mws2, setup['stopFd']) )
+            os.write(setup['readyFd'], b'1')
+            ready = True
+            xasPool.AsyncWaitEvents()
+        except Exception as ex :
+            print('[SubinterpretersSupervisor] Interpreter failed: %s' % ex)
+        finally :
+            if mws2 :
+                mws2.Stop()
+            if not ready :
+                try :
+                    os.write(setup['readyFd'], b'0')
+                except :
+                    pass
+
+    # ------------------------------------------------------------------------
+
+    def _runInterpreterThread(self, interpID, script) :
+        try :
+            err = _interps.run_string(interpID, script)
+            if err :
+                raise Exception(err)
+        except Exception as ex :
+            self._mws2.Log( 'Subinterpreter %s ended with an error: %s' % (interpID, ex),
+                            self._mws2.ERROR )
+        finally :
+            try :
+                _interps.destroy(interpID)
+            except :
+                pass
+            with self._lock :
+                self._endedCount += 1
+
+    # ------------------------------------------------------------------------
+
+    def _waitReady(self) :
+        readyCount = 0
+        timeoutSec = perf_counter() + SubinterpretersSupervisor.READY_TIMEOUT_SEC
+        while readyCount < self._interpsCount :
+            waitSec = timeoutSec - perf_counter()
+            if waitSec <= 0 or not select.select([self._readyRdFd], [ ], [ ], waitSec)[0] :
+                return False
+            data = os.read(self._readyRdFd, self._interpsCount)
+            if b'0' in data :
+                return False
+            readyCount += len(data)
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def Start(self) :
+        self._readyRdFd, self._readyWrFd = os.pipe()
+        self._stopRdFd,  self._stopWrFd  = os.pipe()
+        self._running = True
+        try :
+            script = SubinterpretersSupervisor._SCRIPT % {
+                'sysPath' : list(sys.path),
+                'package' : __name__.rsplit('.', 1)[0],
+                'setup'   : self._getSetup()
+            }
+        except :
+            self.Stop()
+            raise
+        try :
+            for i in range(self._interpsCount) :
+                interpID = _interps.create()
+                self._interpIDs.append(interpID)
+                start_new_thread(self._runInterpreterThread, (interpID, script))
+            if not self._waitReady() :
+                raise Exception()
+        except :
+            self.Stop()
+            raise SubinterpretersSupervisorException('Cannot start %s subinterpreters.' % self._interpsCount)
+
+    # ------------------------------------------------------------------------
+
+    def Stop(self) :
+        self._running = False
+        if self._stopWrFd is not None :
+            # Closing the stop pipe releases all the interpreters at once,
+            os.close(self._stopWrFd)
+            self._stopWrFd = None
+        timeoutSec = perf_counter() + SubinterpretersSupervisor.STOP_TIMEOUT_SEC
+        while self._endedCount < len(self._interpIDs) and perf_counter() < timeoutSec :
+            # Interpreters must end before the process, even if interrupted again,
+            try :
+                sleep(0.05)
+            except KeyboardInterrupt :
+                pass
+        for fd in (self._stopRdFd, self._readyRdFd, self._readyWrFd) :
+            try :
+                os.close(fd)
+            except :
+                pass
+        self._stopRdFd  = None
+        self._readyRdFd = None
+        self._readyWrFd = None
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def IsRunning(self) :
+        return self._running
+
+    @property
+    def InterpretersCount(self) :
+        return len(self._interpIDs) - self._endedCount
+
+# ============================================================================
+# ============================================================================
+# ============================================================================
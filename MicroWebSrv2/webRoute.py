@@ -12,7 +12,7 @@ import re
 
 def WebRoute(method=None, routePath=None, name=None) :
 
-    if type(method) is type(lambda x:x) and not routePath :
+    if type(method) in (type(lambda x:x), type(_asyncHandler)) and not routePath :
         raise ValueError('[@WebRoute] arguments are required for this decorator.')
     
     def decorated(handler) :
@@ -28,8 +28,9 @@ def WebRoute(method=None, routePath=None, name=None) :
 # ============================================================================
 
 def RegisterRoute(handler, method, routePath, name=None) :
-    if type(handler) is not type(lambda x:x) :
-        raise ValueError('"handler" must be a function.')
+    if type(handler) is not type(lambda x:x) and \
+       type(handler) is not type(_asyncHandler) :
+        raise ValueError('"handler" must be a function or a coroutine function.')
     if not isinstance(method, str) or len(method) == 0 :
         raise ValueError('"method" requires a not empty string.')
     if not isinstance(routePath, str) or len(routePath) == 0 :
@@ -167,6 +168,10 @@ PATCH   = 'PATCH'
 
 _registeredRoutes = [ ]
 
+# Coroutine functions are not plain functions on MicroPython,
+async def _asyncHandler(microWebSrv2, request) :
+    pass
+
 # ------------------------------------------------------------------------
 
 class _registeredRoute :
@@ -0,0 +1,116 @@
+
+"""
+Stress benchmark of the managed pool with an increasing count of workers.
+
+Each request runs a CPU bound route handler, so the throughput only scales
+with the workers on a free-threaded (no-GIL) Python or when handlers release
+the GIL. Usage: python bench/stressWorkers.py [durationSec] [clientsCount]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MicroWebSrv2 import *
+from time         import perf_counter, sleep
+from _thread      import allocate_lock, start_new_thread
+import socket
+
+# ============================================================================
+# ============================================================================
+# ============================================================================
+
+BIND_ADDR      = ('127.0.0.1', 8900)
+WORKERS_COUNTS = (1, 2, 4, 8)
+CPU_LOOPS      = 20000
+
+# ============================================================================
+# ============================================================================
+# ============================================================================
+
+@WebRoute(GET, '/stress-cpu')
+def RequestStressCPU(microWebSrv2, request) :
+    x = 0
+    for i in range(CPU_LOOPS) :
+        x += i * i
+    request.Response.ReturnOkJSON({ 'result' : x })
+
+# ============================================================================
+# ============================================================================
+# ============================================================================
+
+def RecvResponse(sock, buf) :
+    while True :
+        idx = buf.find(b'\r\n\r\n')
+        if idx >= 0 :
+            hdr  = bytes(buf[:idx]).lower()
+            pos  = hdr.find(b'content-length:')
+            size = int(hdr[pos+15:].split(b'\r\n', 1)[0]) if pos >= 0 else 0
+            end  = idx + 4 + size
+            if len(buf) >= end :
+                del buf[:end]
+                return True
+        data = sock.recv(16*1024)
+        if not data :
+            return False
+        buf.extend(data)
+
+# ----------------------------------------------------------------------------
+
+def ClientThread(addr, endSec, results, lock) :
+    req   = b'GET /stress-cpu HTTP/1.1\r\nHost: bench\r\nConnection: keep-alive\r\n\r\n'
+    count = 0
+    try :
+        sock = socket.create_connection(addr)
+        buf  = bytearray()
+        while perf_counter() < endSec :
+            sock.sendall(req)
+            if not RecvResponse(sock, buf) :
+                break
+            count += 1
+        sock.close()
+    except :
+        pass
+    with lock :
+        results.append(count)
+
+# ----------------------------------------------------------------------------
+
+def RunStress(workersCount, durationSec, clientsCount) :
+    mws2 = MicroWebSrv2()
+    mws2.BindAddress = BIND_ADDR
+    mws2.SetNormalConfig()
+    mws2.OnLogging   = lambda mws2, msg, msgType : None
+    mws2.StartManaged(parllProcCount=workersCount)
+    try :
+        sleep(0.2)
+        results = [ ]
+        lock    = allocate_lock()
+        endSec  = perf_counter() + durationSec
+        for _ in range(clientsCount) :
+            start_new_thread(ClientThread, (BIND_ADDR, endSec, results, lock))
+        while len(results) < clientsCount :
+            sleep(0.050)
+    finally :
+        mws2.Stop()
+    return sum(results) / durationSec
+
+# ============================================================================
+# ============================================================================
+# ============================================================================
+
+if __name__ == '__main__' :
+    durationSec  = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    clientsCount = int(sys.argv[2])   if len(sys.argv) > 2 else 16
+    try :
+        gil = 'enabled' if sys._is_gil_enabled() else 'disabled'
+    except :
+        gil = 'enabled'
+    print('Python %s, GIL %s, %s clients' % (sys.version.split()[0], gil, clientsCount))
+    baseRate = None
+    for workersCount in WORKERS_COUNTS :
+        rate = RunStress(workersCount, durationSec, clientsCount)
+        if baseRate is None :
+            baseRate = rate or 1
+        print( '%2d workers : %8.0f req/s  x%.2f' % (workersCount, rate, rate / baseRate) )
+        sleep(0.5)